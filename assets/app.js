@@ -0,0 +1,399 @@
+// Script partagé par tous les posts générés (vocab, grammaire, humour).
+// Les données propres à chaque post sont lues dans le bloc JSON #post-config de la page.
+
+// Configuration
+const CONFIG = JSON.parse(document.getElementById('post-config').textContent);
+const SUBREDDITS = CONFIG.subreddits;
+const SUBREDDITS_URLS = CONFIG.subredditsUrls;
+const PS_VARIATIONS = CONFIG.psVariations;
+const STORAGE_KEY = CONFIG.storageKey;
+
+// API de l'état de publication (publication_server.py) : seulement si la page est servie en HTTP
+const STATE_API_URL = location.protocol.startsWith('http') ? '/api/state' : null;
+// Délai de regroupement des modifications avant envoi au serveur
+const SYNC_DELAY_MS = 1000;
+
+// État par défaut
+function defaultState() {
+    return {
+        published: SUBREDDITS.map(() => false),
+        selectedSubredditIndex: 0,
+        editedContent: {}
+    };
+}
+
+// État courant en mémoire (chargé au démarrage)
+let currentState = null;
+
+// Modifications en attente d'envoi au serveur (clé -> état)
+const pendingStates = {};
+let syncTimer = null;
+
+// Charger l'état courant (localStorage en secours si le serveur n'est pas utilisé)
+function loadState() {
+    if (!currentState) {
+        const saved = localStorage.getItem(STORAGE_KEY);
+        currentState = saved ? JSON.parse(saved) : defaultState();
+    }
+    return currentState;
+}
+
+// Sauvegarder l'état (localStorage + envoi groupé au serveur)
+function saveState(state) {
+    currentState = state;
+    localStorage.setItem(STORAGE_KEY, JSON.stringify(state));
+    queueSync(state);
+}
+
+// Ajouter l'état au prochain lot envoyé au serveur
+function queueSync(state) {
+    if (!STATE_API_URL) return;
+    pendingStates[STORAGE_KEY] = {
+        ...state,
+        subreddits: SUBREDDITS,
+        path: location.pathname.replace(/^\/posts\//, '')
+    };
+    clearTimeout(syncTimer);
+    syncTimer = setTimeout(flushSync, SYNC_DELAY_MS);
+}
+
+// Envoyer le lot de modifications en attente (sendBeacon quand la page se ferme)
+function flushSync(closing = false) {
+    clearTimeout(syncTimer);
+    const keys = Object.keys(pendingStates);
+    if (keys.length === 0) return;
+
+    const states = {};
+    keys.forEach(key => {
+        states[key] = pendingStates[key];
+        delete pendingStates[key];
+    });
+    const body = JSON.stringify({ states });
+
+    if (closing && navigator.sendBeacon) {
+        navigator.sendBeacon(STATE_API_URL, new Blob([body], { type: 'application/json' }));
+        return;
+    }
+    fetch(STATE_API_URL, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body, keepalive: true })
+        .then(response => {
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        })
+        .catch(err => {
+            // Le lot sera renvoyé avec la prochaine modification
+            console.error('Erreur de synchronisation:', err);
+            keys.forEach(key => {
+                if (!pendingStates[key]) pendingStates[key] = states[key];
+            });
+        });
+}
+
+// Charger l'état depuis le serveur ; un état présent seulement dans le localStorage y est importé
+async function loadServerState() {
+    if (!STATE_API_URL) return;
+    try {
+        const response = await fetch(`${STATE_API_URL}?key=${encodeURIComponent(STORAGE_KEY)}`);
+        const states = await response.json();
+        const serverState = states[STORAGE_KEY];
+        const hasServerState = serverState && (serverState.published.some(Boolean)
+            || Object.keys(serverState.editedContent).length > 0 || serverState.selectedSubredditIndex > 0);
+
+        if (hasServerState) {
+            currentState = {
+                ...defaultState(),
+                ...serverState,
+                published: SUBREDDITS.map((_, index) => Boolean(serverState.published[index]))
+            };
+            localStorage.setItem(STORAGE_KEY, JSON.stringify(currentState));
+        } else if (localStorage.getItem(STORAGE_KEY)) {
+            queueSync(loadState());
+        }
+    } catch (err) {
+        console.error('Serveur de publication indisponible, état local utilisé:', err);
+    }
+}
+
+window.addEventListener('pagehide', () => flushSync(true));
+
+// Trouver le prochain subreddit non publié
+function findNextUnpublishedIndex(state) {
+    const index = state.published.findIndex(pub => pub === false);
+    return index !== -1 ? index : SUBREDDITS.length - 1;
+}
+
+// Sélectionner un subreddit
+function selectSubreddit(index) {
+    const state = loadState();
+    state.selectedSubredditIndex = index;
+    saveState(state);
+    updateDisplay(state);
+}
+
+// Mettre à jour l'affichage
+function updateDisplay(state) {
+    // Vérifier si le subreddit sélectionné est coché
+    // Si oui, auto-sélectionner le prochain non-coché
+    if (state.published[state.selectedSubredditIndex]) {
+        state.selectedSubredditIndex = findNextUnpublishedIndex(state);
+        saveState(state);
+    }
+
+    const selectedIndex = state.selectedSubredditIndex;
+
+    // Mettre à jour le lien du subreddit
+    const subredditLink = document.getElementById('current-subreddit-link');
+    subredditLink.textContent = SUBREDDITS_URLS[selectedIndex];
+    subredditLink.href = SUBREDDITS_URLS[selectedIndex];
+
+    // Mettre à jour le PS
+    const psText = PS_VARIATIONS[selectedIndex];
+    document.getElementById('ps-text').textContent = psText;
+
+    // Mettre à jour le PS promo subreddit
+    const psPrefix = psText.startsWith('PS:') ? 'PS-2:' : 'PS:';
+    document.getElementById('ps-subreddit').textContent = `${psPrefix} More posts like this on ${CONFIG.promoSubreddit}`;
+
+    // Créer/mettre à jour les checkboxes
+    const trackerList = document.getElementById('tracker-list');
+    trackerList.innerHTML = '';
+
+    SUBREDDITS.forEach((subreddit, index) => {
+        const item = document.createElement('div');
+        item.className = 'tracker-item';
+
+        const checkbox = document.createElement('input');
+        checkbox.type = 'checkbox';
+        checkbox.id = `checkbox-${index}`;
+        checkbox.checked = state.published[index];
+        checkbox.addEventListener('change', () => handleCheckboxChange(index));
+
+        // Conteneur pour le label et le bouton d'édition
+        const labelContainer = document.createElement('div');
+        labelContainer.className = 'label-container';
+
+        // Texte du label (span au lieu de label)
+        const labelText = document.createElement('span');
+        labelText.id = `tracker-label-${index}`;
+        labelText.className = 'label-text';
+        labelText.contentEditable = 'true';
+
+        // Restaurer le texte édité ou utiliser le nom du subreddit par défaut
+        if (state.editedContent && state.editedContent[`tracker-label-${index}`]) {
+            labelText.textContent = state.editedContent[`tracker-label-${index}`];
+        } else {
+            labelText.textContent = subreddit;
+        }
+
+        // Ajouter la classe selected si c'est le subreddit actuellement sélectionné
+        if (index === selectedIndex) {
+            labelText.classList.add('selected');
+        }
+
+        // Clic sur le texte = sélection du subreddit
+        labelText.addEventListener('click', (e) => {
+            // Ne pas sélectionner si on est en train d'éditer
+            if (document.activeElement === labelText) {
+                return;
+            }
+            e.preventDefault();
+            selectSubreddit(index);
+        });
+
+        // Désactiver l'édition par défaut (on utilisera le bouton crayon)
+        labelText.addEventListener('focus', (e) => {
+            // Si focus sans avoir cliqué sur le bouton édition, annuler
+            if (!labelText.dataset.editing) {
+                labelText.blur();
+            }
+        });
+
+        // Sauvegarder les modifications quand on quitte l'édition
+        labelText.addEventListener('blur', () => {
+            delete labelText.dataset.editing;
+            const state = loadState();
+            if (!state.editedContent) {
+                state.editedContent = {};
+            }
+            state.editedContent[`tracker-label-${index}`] = labelText.textContent;
+            saveState(state);
+        });
+
+        // Entrée = terminer l'édition
+        labelText.addEventListener('keydown', (e) => {
+            if (e.key === 'Enter') {
+                e.preventDefault();
+                labelText.blur();
+            }
+        });
+
+        // Bouton d'édition (crayon)
+        const editBtn = document.createElement('button');
+        editBtn.className = 'edit-btn';
+        editBtn.textContent = '✏️';
+        editBtn.title = 'Éditer';
+
+        // Clic sur le crayon = activer l'édition
+        editBtn.addEventListener('click', (e) => {
+            e.preventDefault();
+            e.stopPropagation();
+            labelText.dataset.editing = 'true';
+            labelText.focus();
+            // Sélectionner tout le texte
+            const range = document.createRange();
+            range.selectNodeContents(labelText);
+            const selection = window.getSelection();
+            selection.removeAllRanges();
+            selection.addRange(range);
+        });
+
+        labelContainer.appendChild(labelText);
+        labelContainer.appendChild(editBtn);
+
+        item.appendChild(checkbox);
+        item.appendChild(labelContainer);
+        trackerList.appendChild(item);
+    });
+
+    // Restaurer le contenu édité
+    if (state.editedContent) {
+        Object.keys(state.editedContent).forEach(id => {
+            const element = document.getElementById(id);
+            if (element) {
+                element.textContent = state.editedContent[id];
+            }
+        });
+    }
+}
+
+// Gérer le changement de checkbox (tracking seulement)
+function handleCheckboxChange(index) {
+    const state = loadState();
+    // Toggle l'état (permettre de décocher)
+    state.published[index] = !state.published[index];
+
+    // Si on coche le subreddit actuellement sélectionné,
+    // auto-sélectionner le prochain non-coché
+    if (state.published[index] && index === state.selectedSubredditIndex) {
+        state.selectedSubredditIndex = findNextUnpublishedIndex(state);
+    }
+
+    // Sauvegarder et mettre à jour
+    saveState(state);
+    updateDisplay(state);
+}
+
+// Sauvegarder les modifications de contenu éditable
+function setupContentEditableSaving() {
+    const editableElements = document.querySelectorAll('[contenteditable="true"]');
+    editableElements.forEach(element => {
+        element.addEventListener('blur', () => {
+            const state = loadState();
+            if (!state.editedContent) {
+                state.editedContent = {};
+            }
+            state.editedContent[element.id] = element.textContent;
+            saveState(state);
+        });
+    });
+}
+
+// Copier l'explication (ou la description) + PS + Happy learning! dans le presse-papiers
+function setupCopyButton() {
+    const copyBtn = document.getElementById('copy-btn');
+    const label = copyBtn.textContent;
+    copyBtn.addEventListener('click', async () => {
+        const explanation = document.getElementById(CONFIG.copyTextId).textContent;
+        const ps = document.getElementById('ps-text').textContent;
+        const psSubreddit = document.getElementById('ps-subreddit').textContent;
+        const textToCopy = explanation + '\n\n' + ps + '\n\n' + psSubreddit + '\n\nHappy learning!';
+
+        try {
+            await navigator.clipboard.writeText(textToCopy);
+
+            // Feedback visuel
+            const originalText = copyBtn.textContent;
+            copyBtn.textContent = '✅ Copié !';
+            copyBtn.classList.add('copied');
+
+            setTimeout(() => {
+                copyBtn.textContent = originalText;
+                copyBtn.classList.remove('copied');
+            }, 2000);
+        } catch (err) {
+            console.error('Erreur lors de la copie:', err);
+            copyBtn.textContent = '❌ Erreur';
+            setTimeout(() => {
+                copyBtn.textContent = label;
+            }, 2000);
+        }
+    });
+}
+
+// Copier le titre dans le presse-papiers
+function setupCopyTitleButton() {
+    const copyTitleBtn = document.getElementById('copy-title-btn');
+    copyTitleBtn.addEventListener('click', async () => {
+        // Titre complet : partie fixe éventuelle + partie éditable
+        const title = CONFIG.titlePrefix + document.getElementById(CONFIG.titleId).textContent + CONFIG.titleSuffix;
+
+        try {
+            await navigator.clipboard.writeText(title);
+
+            // Feedback visuel
+            const originalText = copyTitleBtn.textContent;
+            copyTitleBtn.textContent = '✅ Copié !';
+            copyTitleBtn.classList.add('copied');
+
+            setTimeout(() => {
+                copyTitleBtn.textContent = originalText;
+                copyTitleBtn.classList.remove('copied');
+            }, 2000);
+        } catch (err) {
+            console.error('Erreur lors de la copie:', err);
+            copyTitleBtn.textContent = '❌ Erreur';
+            setTimeout(() => {
+                copyTitleBtn.textContent = '📋 Copier le titre';
+            }, 2000);
+        }
+    });
+}
+
+// Copier le lien du subreddit dans le presse-papiers
+function setupCopySubredditLinkButton() {
+    const copySubredditLinkBtn = document.getElementById('copy-subreddit-link-btn');
+    copySubredditLinkBtn.addEventListener('click', async () => {
+        const state = loadState();
+        const selectedIndex = state.selectedSubredditIndex;
+        const subredditUrl = SUBREDDITS_URLS[selectedIndex];
+
+        try {
+            await navigator.clipboard.writeText(subredditUrl);
+
+            // Feedback visuel
+            const originalText = copySubredditLinkBtn.textContent;
+            copySubredditLinkBtn.textContent = '✅ Copié !';
+            copySubredditLinkBtn.classList.add('copied');
+
+            setTimeout(() => {
+                copySubredditLinkBtn.textContent = originalText;
+                copySubredditLinkBtn.classList.remove('copied');
+            }, 2000);
+        } catch (err) {
+            console.error('Erreur lors de la copie:', err);
+            copySubredditLinkBtn.textContent = '❌ Erreur';
+            setTimeout(() => {
+                copySubredditLinkBtn.textContent = '📋 Copier le lien';
+            }, 2000);
+        }
+    });
+}
+
+// Initialisation au chargement de la page
+document.addEventListener('DOMContentLoaded', async () => {
+    await loadServerState();
+    const state = loadState();
+    updateDisplay(state);
+    setupContentEditableSaving();
+    setupCopyButton();
+    setupCopyTitleButton();
+    setupCopySubredditLinkButton();
+});
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark des backends LLM (llm.py) sur les étapes textuelles du générateur vocab :
+latence (p50/p95), débit (tokens générés par seconde), part du prompt servie par le cache
+de préfixe et qualité par étape, pour OpenAI
+et pour le serveur local compatible OpenAI (LLM_LOCAL_URL / LLM_LOCAL_MODEL).
+
+La qualité est mesurée par rapport à la sortie OpenAI (similarité des mots, 1.0 = identique) ;
+pour hide_text, c'est la part de réponses structurellement valides (generate.is_valid_hidden).
+hide_text passe d'abord par hide_text_draft (modèle léger) : le taux d'escalade vers hide_text
+est affiché par backend.
+
+Usage: python benchmarks/bench_llm.py [--backends openai,local] [--repeat 1]
+Nécessite OPENAI_API_KEY et un serveur local lancé (ex: llama-server -m model.gguf --port 8080).
+"""
+
+import argparse
+import difflib
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Chaque exemple doit vraiment partir au modèle (pas de réponse de la mémoire de traduction ni du cache)
+os.environ['TRANSLATION_MEMORY'] = '0'
+os.environ['SEMANTIC_CACHE'] = '0'
+
+import llm  # noqa: E402
+from generate import (translate_subtitle, translate_subtitle_natural,  # noqa: E402
+                      hide_text_in_translation, generate_explanation, is_valid_hidden)
+
+# Sous-titres représentatifs : (sous-titre, expression cachée, est une expression)
+SAMPLES = [
+    ("Ça vous dérange pas la fumée ?", "déranger", False),
+    ("Et puis c'est pas gagné.", "c'est pas gagné", True),
+    ("Vous faites fausse route.", "faire fausse route", True),
+    ("Il faut lâcher prise, maintenant.", "lâcher prise", True),
+    ("On est en déplacement toute la semaine.", "en déplacement", True),
+]
+
+
+def similarity(a, b):
+    """Similarité entre deux textes (mots, insensible à la casse)"""
+    return difflib.SequenceMatcher(None, a.lower().split(), b.lower().split()).ratio()
+
+
+def run_backend(backend, repeat):
+    """Exécute toutes les étapes avec un backend, retourne les sorties par étape"""
+    os.environ['LLM_LOCAL_STAGES'] = 'all' if backend == 'local' else ''
+    outputs = {'translate_literal': [], 'translate_natural': [], 'hide_text': [], 'vocab_explanation': []}
+    for _ in range(repeat):
+        for subtitle, text, is_expression in SAMPLES:
+            outputs['translate_literal'].append(translate_subtitle(subtitle))
+            natural = translate_subtitle_natural(subtitle)
+            outputs['translate_natural'].append(natural)
+            outputs['hide_text'].append((hide_text_in_translation(natural, subtitle, text, is_expression), natural))
+            outputs['vocab_explanation'].append(generate_explanation(text, is_expression=is_expression))
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark des backends LLM par étape')
+    parser.add_argument('--backends', default='openai,local', help='Backends comparés (openai,local)')
+    parser.add_argument('--repeat', type=int, default=1, help='Nombre de passages sur les exemples')
+    args = parser.parse_args()
+
+    backends = [backend.strip() for backend in args.backends.split(',')]
+    results = {}
+    for backend in backends:
+        print(f"⏳ Backend {backend}...")
+        start = len(llm.call_log)
+        results[backend] = (run_backend(backend, args.repeat), llm.call_log[start:])
+
+    reference = results['openai'][0] if 'openai' in results else None
+
+    print(f"\n{'étape':<18} {'backend':<8} {'p50 ms':>8} {'p95 ms':>8} {'tok/s':>7} {'cache':>6} {'qualité':>8}")
+    for stage in ('translate_literal', 'translate_natural', 'hide_text_draft', 'hide_text', 'vocab_explanation'):
+        for backend in backends:
+            outputs, calls = results[backend]
+            calls = [call for call in calls if call['stage'] == stage]
+            if not calls:
+                print(f"{stage:<18} {backend:<8} (aucun appel)")
+                continue
+            if any(call['backend'] != backend for call in calls):
+                print(f"{stage:<18} {backend:<8} (repli sur openai, serveur local indisponible)")
+                continue
+            latencies = sorted(call['ms'] for call in calls)
+            tokens = sum(call['completion_tokens'] for call in calls)
+            throughput = tokens / (sum(latencies) / 1000) if latencies else 0
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            prompt_tokens = sum(call['prompt_tokens'] for call in calls)
+            cached = sum(call['cached_tokens'] for call in calls) / prompt_tokens if prompt_tokens else 0
+
+            if stage == 'hide_text_draft':
+                # Réponses intermédiaires de la cascade : seul le taux d'escalade compte
+                quality = float('nan')
+            elif stage == 'hide_text':
+                quality = statistics.mean(is_valid_hidden(hidden, visible) for hidden, visible in outputs[stage])
+            elif reference is not None:
+                quality = statistics.mean(similarity(out, ref) for out, ref in zip(outputs[stage], reference[stage]))
+            else:
+                quality = float('nan')
+
+            print(f"{stage:<18} {backend:<8} {statistics.median(latencies):8.0f} {p95:8.0f} "
+                  f"{throughput:7.1f} {cached:6.0%} {quality:8.2f}")
+
+    for backend in backends:
+        calls = results[backend][1]
+        drafts = sum(call['stage'] == 'hide_text_draft' for call in calls)
+        escalations = sum(call['stage'] == 'hide_text' for call in calls)
+        if drafts:
+            print(f"\nhide_text ({backend}) : {escalations}/{drafts} escalade(s) vers {llm.STAGES['hide_text']['model']} "
+                  f"({escalations / drafts:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark du rendu PNG des visuels (slide_renderer.py) : slides par seconde
+pour les posts grammaire et vocab, avec et sans encodage PNG (vocab : deux slides par
+paire de captures, comme generate.py --png).
+Usage: python benchmarks/bench_render.py [--slides 50] [--scale 2]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image  # noqa: E402
+from slide_renderer import render_grammar_slide, render_vocab_slide  # noqa: E402
+
+
+def bench(label, render, slides):
+    """Mesure le rendu seul puis rendu + encodage PNG"""
+    start = time.perf_counter()
+    images = [render(i) for i in range(slides)]
+    render_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    total_bytes = 0
+    for image in images:
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG', compress_level=3)
+        total_bytes += buffer.tell()
+    encode_s = time.perf_counter() - start
+
+    print(f"{label:<8} rendu {render_s / slides * 1000:6.1f} ms/slide ({slides / render_s:6.1f} slides/s) | "
+          f"+ PNG {(render_s + encode_s) / slides * 1000:6.1f} ms/slide ({slides / (render_s + encode_s):5.1f} slides/s, "
+          f"{total_bytes / slides / 1024:.0f} Ko)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark du rendu PNG des visuels')
+    parser.add_argument('--slides', type=int, default=50, help='Nombre de slides rendues par type')
+    parser.add_argument('--scale', type=int, default=2, help='Facteur d\'échelle (2 = écran Retina)')
+    args = parser.parse_args()
+
+    # Comme generate.py --png : une paire de captures par post, rendue deux fois (visible puis cachée)
+    posts = [(Image.new('RGB', (1920, 1080), '#3a5a40'), Image.new('RGB', (1920, 1080), '#588157'))
+             for _ in range((args.slides + 1) // 2)]
+    translations = ("It doesn't bother you, the smoke?", "It doesn't ______ you, the smoke?")
+
+    bench('grammar', lambda i: render_grammar_slide(
+        f'Il faut que tu viennes demain ({i}).', 'Il faut que tu viens demain.',
+        'Il faut que tu venir demain.', scale=args.scale), args.slides)
+    bench('vocab', lambda i: render_vocab_slide(
+        f'expression {i // 2}', posts[i // 2][0], translations[i % 2], posts[i // 2][1],
+        "And then it's not a done deal.", 'Movie (2020)', 'Movie (2021)', scale=args.scale), args.slides)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark du rendu des pages : temps de rendu par post sur un lot de 1000 posts
+pour chaque type (vocab, grammar, humor).
+Usage: python benchmarks/bench_templates.py [--posts 1000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from template_engine import get_template, render_template  # noqa: E402
+
+COMMON = {
+    'font_links': '',
+    'css_url': '../_assets/app.0123456789ab.css',
+    'js_url': '../_assets/app.0123456789ab.js',
+    'body_class': 'post-card',
+    'text_class': 'explanation',
+    'copy_label': '📋 Copier Explication + PS',
+    'config_json': '{"storageKey": "reddit-post-x", "subreddits": ["r/a", "r/b", "r/c", "r/d"]}',
+}
+
+EXPLANATION = ('**"Lâcher prise" means to let go.** It suggests accepting a situation.\n\n'
+               'Examples :\n- "Il est temps de lâcher prise." -> "It\'s time to let go."') * 3
+
+
+def contexts(i):
+    """Contexte de rendu représentatif pour chaque type de post (le numéro varie à chaque post)"""
+    return {
+        'vocab.html': dict(COMMON, page_title=f'What does "expression {i}" mean here?', body_class='post-vocab',
+                           expression=f'expression {i}', image1_path=f'../img/post-{i}-scene1.png',
+                           image2_path=f'../img/post-{i}-scene2.png', movie_title1='Movie (2020)',
+                           movie_title2='Movie (2021)', translation1_visible='It doesn\'t bother you the smoke.',
+                           translation1_hidden='It doesn\'t ______ you the smoke.',
+                           translation2_visible='And then it\'s not won.', translation2_hidden='And then ____________.',
+                           explanation=EXPLANATION),
+        'grammar.html': dict(COMMON, page_title=f'Grammar: rule {i}', option1='Il faut que tu viennes.',
+                             option2='Il faut que tu viens.', option3='Il faut que tu venir.',
+                             explanation=EXPLANATION),
+        'humor.html': dict(COMMON, page_title='Learn French with humor', text_class='description',
+                           title_display=f'meme {i}', image_path=f'../../img/humor/meme-{i}.png',
+                           description=EXPLANATION),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark du rendu des templates HTML')
+    parser.add_argument('--posts', type=int, default=1000, help='Nombre de posts rendus par type')
+    args = parser.parse_args()
+
+    for name in ('vocab.html', 'grammar.html', 'humor.html'):
+        start = time.perf_counter()
+        get_template(name)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        batch = [contexts(i)[name] for i in range(args.posts)]
+        start = time.perf_counter()
+        total_bytes = 0
+        for context in batch:
+            total_bytes += len(render_template(name, **context))
+        elapsed = time.perf_counter() - start
+
+        print(f"{name:<13} compilation {compile_ms:6.2f} ms | {args.posts} posts en {elapsed * 1000:7.1f} ms "
+              f"→ {elapsed / args.posts * 1e6:6.1f} µs/post ({total_bytes / args.posts / 1024:.1f} Ko/post)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Enregistrement et rejeu des appels externes (chat.completions via llm.py, liens Ablink via core.py)
+dans des cassettes JSON (dossier cassettes/), pour mesurer et profiler le pipeline sans réseau
+et avec exactement les mêmes réponses d'une exécution à l'autre.
+
+Configuration (.env ou variables d'environnement) :
+    CASSETTE=vocab-lacher-prise      # nom de la cassette (cassettes/<nom>.json)
+    CASSETTE_MODE=record             # record : appels réels enregistrés ; replay : réponses rejouées
+    CASSETTE_LATENCY=recorded        # en replay : zero (défaut) ou recorded (attend la durée enregistrée)
+
+Chaque appel est retrouvé par l'empreinte de sa requête (les images base64 sont remplacées par
+leur empreinte). Si le pipeline a changé (nouveau prompt...), le prochain appel du même type et
+de la même étape est rejoué, avec un avertissement.
+
+Usage:
+    python cassettes.py show <nom>     # appels enregistrés et leur durée
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from core import getenv
+
+CASSETTES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cassettes')
+CASSETTE_VERSION = 1
+MODES = ('record', 'replay')
+
+DATA_URL_PATTERN = re.compile(r'^data:([^;,]+)(?:;base64)?,(.*)$', re.DOTALL)
+
+_cassette = None
+_used = set()
+_lock = threading.Lock()
+
+
+def cassette_path(name):
+    """Chemin du fichier d'une cassette"""
+    return os.path.join(CASSETTES_DIR, f"{name}.json")
+
+
+def get_mode():
+    """Mode actif ('record', 'replay') ou None si aucune cassette n'est configurée"""
+    name, mode = getenv('CASSETTE'), getenv('CASSETTE_MODE') or 'replay'
+    if not name:
+        return None
+    if mode not in MODES:
+        print(f"❌ Erreur : CASSETTE_MODE doit valoir record ou replay (reçu : {mode})")
+        sys.exit(1)
+    return mode
+
+
+def _redact(value):
+    """Copie de la requête où les images base64 sont remplacées par leur empreinte"""
+    if isinstance(value, dict):
+        return {key: _redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_redact(item) for item in value]
+    if isinstance(value, str):
+        match = DATA_URL_PATTERN.match(value)
+        if match and len(value) > 256:
+            return f"data:{match.group(1)};sha1={hashlib.sha1(match.group(2).encode()).hexdigest()}"
+    return value
+
+
+def request_key(kind, request):
+    """Empreinte d'une requête (type d'appel + paramètres)"""
+    canonical = json.dumps([kind, request], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def _load():
+    """Cassette active (lue au premier appel en replay, vide en record)"""
+    global _cassette
+    if _cassette is None:
+        name = getenv('CASSETTE')
+        if get_mode() == 'record':
+            _cassette = {'version': CASSETTE_VERSION, 'name': name, 'created_at': time.time(), 'interactions': []}
+        else:
+            try:
+                with open(cassette_path(name), 'r', encoding='utf-8') as f:
+                    _cassette = json.load(f)
+            except OSError:
+                print(f"❌ Erreur : Cassette introuvable : {cassette_path(name)} (enregistre-la avec CASSETTE_MODE=record)")
+                sys.exit(1)
+            if _cassette.get('version') != CASSETTE_VERSION:
+                print(f"❌ Erreur : Cassette {name} au format v{_cassette.get('version')}, v{CASSETTE_VERSION} attendu (à réenregistrer)")
+                sys.exit(1)
+    return _cassette
+
+
+def _save():
+    """Écrit la cassette de façon atomique (après chaque appel : un arrêt en cours garde le début)"""
+    os.makedirs(CASSETTES_DIR, exist_ok=True)
+    path = cassette_path(_cassette['name'])
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(_cassette, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _find(kind, key, request):
+    """Prochain appel enregistré pour cette requête (sinon même type et même étape)"""
+    interactions = _load()['interactions']
+    for i, interaction in enumerate(interactions):
+        if i not in _used and interaction['key'] == key:
+            return i
+    for i, interaction in enumerate(interactions):
+        if i not in _used and interaction['kind'] == kind and interaction['request'].get('stage') == request.get('stage'):
+            print(f"⚠️  Attention : Requête {kind} {request.get('stage') or ''} absente de la cassette, "
+                  f"réponse enregistrée suivante rejouée")
+            return i
+    print(f"❌ Erreur : Plus aucun appel {kind} {request.get('stage') or ''} dans la cassette {getenv('CASSETTE')}")
+    sys.exit(1)
+
+
+def call(kind, request, live_call, encode=None, decode=None):
+    """Exécute un appel externe selon le mode : direct, enregistré, ou rejoué depuis la cassette"""
+    mode = get_mode()
+    if mode is None:
+        return live_call()
+
+    request = _redact(request)
+    key = request_key(kind, request)
+
+    if mode == 'replay':
+        with _lock:
+            index = _find(kind, key, request)
+            _used.add(index)
+            interaction = _cassette['interactions'][index]
+        if getenv('CASSETTE_LATENCY') == 'recorded':
+            time.sleep(interaction['ms'] / 1000)
+        return decode(interaction['response']) if decode else interaction['response']
+
+    start = time.perf_counter()
+    result = live_call()
+    ms = (time.perf_counter() - start) * 1000
+    with _lock:
+        _load()['interactions'].append({
+            'kind': kind,
+            'key': key,
+            'request': request,
+            'response': encode(result) if encode else result,
+            'ms': round(ms, 1),
+        })
+        _save()
+    return result
+
+
+def show(name):
+    """Affiche les appels d'une cassette"""
+    try:
+        with open(cassette_path(name), 'r', encoding='utf-8') as f:
+            cassette = json.load(f)
+    except OSError:
+        print(f"❌ Erreur : Cassette introuvable : {cassette_path(name)}")
+        sys.exit(1)
+
+    interactions = cassette['interactions']
+    for interaction in interactions:
+        print(f"{interaction['kind']:<11} {interaction['request'].get('stage', ''):<20} {interaction['ms']:8.0f} ms")
+    total = sum(interaction['ms'] for interaction in interactions)
+    print(f"\n✓ {len(interactions)} appel(s), {total / 1000:.1f} s au total (format v{cassette.get('version')})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cassettes des appels externes (OpenAI, Ablink)')
+    parser.add_argument('command', choices=['show'], help='show : liste les appels enregistrés')
+    parser.add_argument('name', help='Nom de la cassette (cassettes/<nom>.json)')
+    args = parser.parse_args()
+    show(args.name)
+
+
+if __name__ == '__main__':
+    main()
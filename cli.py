@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Point d'entrée unique pour les trois types de posts.
+
+Usage:
+    python cli.py vocab --expression "..." --image1 ... --image2 ... [options de generate.py]
+    python cli.py grammar [--test] [--png]
+    python cli.py humor --image <chemin_image> [--format png|webp|avif] [--test]
+    python cli.py shell
+
+En mode shell, les commandes vocab/grammar/humor s'enchaînent dans le même processus :
+modules, client OpenAI, templates compilés, index des images et polices restent chargés
+d'un post à l'autre.
+"""
+
+import argparse
+import shlex
+import threading
+import time
+
+COMMANDS = ['vocab', 'grammar', 'humor']
+
+SHELL_HELP = """Commandes :
+  vocab --expression "..." --image1 ... --image2 ... [--rognage N] [--forcer] [--format F] [--png] [--corpus]
+  vocab --mot "..." --image1 ... --image2 ...
+  grammar [--test] [--png]
+  humor --image <chemin_image> [--format png|webp|avif] [--test]
+  aide                                  affiche cette aide
+  quitter                               ferme le shell (ou Ctrl+D)"""
+
+
+def run_command(command, args):
+    """Exécute une commande vocab/grammar/humor avec ses arguments"""
+    if command == 'vocab':
+        import generate
+        generate.main(args, prog='cli.py vocab')
+    elif command == 'grammar':
+        import generate_grammar
+        generate_grammar.main(test_mode='--test' in args, render_png='--png' in args)
+    elif command == 'humor':
+        import generate_humor
+        generate_humor.main(test_mode='--test' in args, argv=args)
+
+
+def _warm_up():
+    """Précharge en arrière-plan ce dont les posts auront besoin (pendant que l'utilisateur tape)"""
+    import generate  # noqa: F401  (importe aussi core, image_pipeline, image_hash, templates...)
+    import generate_grammar  # noqa: F401
+    import generate_humor  # noqa: F401
+    import openai  # noqa: F401
+    import numpy  # noqa: F401
+    from template_engine import get_template
+    for name in ('vocab.html', 'grammar.html', 'humor.html', 'index.html'):
+        get_template(name)
+
+
+def shell():
+    """Boucle interactive : une commande par ligne, le processus reste chargé entre les posts"""
+    try:
+        import readline  # noqa: F401  (historique et édition de ligne)
+    except ImportError:
+        pass
+
+    threading.Thread(target=_warm_up, daemon=True).start()
+
+    print("=" * 60)
+    print("🎬 GÉNÉRATEUR DE POSTS - SHELL")
+    print("=" * 60)
+    print(SHELL_HELP)
+
+    while True:
+        try:
+            line = input("\n> ").strip()
+        except EOFError:
+            print("\n👋 À bientôt !")
+            break
+        except KeyboardInterrupt:
+            print()
+            continue
+
+        if not line:
+            continue
+        try:
+            words = shlex.split(line)
+        except ValueError as e:
+            print(f"⚠️  Commande invalide : {e}")
+            continue
+
+        command, args = words[0], words[1:]
+        if command in ('quitter', 'exit', 'quit'):
+            print("👋 À bientôt !")
+            break
+        if command in ('aide', 'help'):
+            print(SHELL_HELP)
+            continue
+        if command not in COMMANDS:
+            print(f"⚠️  Commande inconnue : {command} (tape 'aide')")
+            continue
+
+        start = time.perf_counter()
+        try:
+            run_command(command, args)
+        except SystemExit as e:
+            # Les scripts quittent sur erreur : dans le shell on revient simplement à l'invite
+            if e.code not in (None, 0):
+                print(f"⚠️  Commande interrompue (code {e.code})")
+        except KeyboardInterrupt:
+            print("\n⚠️  Commande annulée")
+        except Exception as e:
+            # Erreur inattendue (API, délai dépassé, fichier manquant...) : le shell et son état restent
+            print(f"❌ Erreur : {command} a échoué ({type(e).__name__} : {e})")
+        print(f"⏱️  {command} : {time.perf_counter() - start:.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Génère des posts Reddit (vocab, grammaire, humour) depuis un seul point d\'entrée'
+    )
+    parser.add_argument('command', choices=COMMANDS + ['shell'],
+                        help='vocab, grammar, humor : un post ; shell : enchaîne les posts dans le même processus')
+    parser.add_argument('args', nargs=argparse.REMAINDER,
+                        help='Arguments de la commande (voir python cli.py <commande> --help)')
+
+    args = parser.parse_args()
+
+    if args.command == 'shell':
+        shell()
+    else:
+        run_command(args.command, args.args)
+
+
+if __name__ == '__main__':
+    main()
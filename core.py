@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Fonctions communes aux trois générateurs (vocab, grammaire, humour) : slug, post-scriptum,
+liens raccourcis Ablink et client OpenAI.
+
+Les dépendances lourdes (openai, requests, dotenv) ne sont importées qu'au premier appel
+qui en a besoin : --help, le mode test et les étapes sans appel réseau démarrent sans elles
+(mesure : python -X importtime generate.py --help).
+"""
+
+import os
+import re
+import sys
+
+# Variations de post-scriptum promotionnel (choisi aléatoirement)
+PS_VARIATIONS = [
+    "PS: If you watch Netflix on your computer and want to support this post, you can check [this tool] that I made.",
+    "PS: If you like watching Netflix and sometimes hesitate between putting the subtitles in French or in your native language, I made a [little tool] that solves this problem",
+    "PS: if you like watching French content on Netflix and sometimes hesitate between putting the subtitles in French or in your native language, I made a little tool called Subly that adjusts the subtitles to your level. If you want to support this post and if you think that this tool could be useful, feel free give it a try by [clicking here] ;)",
+    "PS: if you like watching French content on Netflix and sometimes hesitate between putting the subtitles in French or in your native language, I made a little tool called Subly that I would recommend to use. This extension adjusts the subtitles to your level (if a subtitle is adapted to your level, it displays it in French, if a subtitle is too hard, it displays it in your native language). I use it to learn Portuguese, it provides a good balance between practicing your target language and enjoying the show. Here is [the link to try it].",
+    "How to support these posts: check out [this tool] that I made to learn French with Netflix.",
+    "If you want to improve your French while watching Netflix, here is a [simple tool] I made that decides if a subtitle should be displayed in French or in your Native language based on your level.",
+    "Quick note: If you watch Netflix on your computer, I built a [simple tool] that shows subtitles in French only when the words are familiar to you, otherwise it switches to your native language.",
+    "PS: If you're a Netflix user, I made a [simple tool] that automatically chooses between French and native subtitles depending on the vocabulary you know.",
+    "PS: If you want to learn dozens of new words every time you watch a Netflix show, you can [try my tool called Subly]."
+]
+
+ABLINK_API_URL = "https://ablink.io/api/links"
+ABLINK_TARGET_URL = "https://subly-extension.vercel.app/landing"
+TEST_SHORT_LINK = "https://ablink.io/test-link"
+SHORT_LINK_TIMEOUT = 10
+
+_env_loaded = False
+_openai_client = None
+
+
+def getenv(name):
+    """Variable d'environnement, après chargement du fichier .env (une seule fois)"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+    return os.getenv(name)
+
+
+def slugify(text):
+    """Convertit un texte en slug (minuscules, espaces -> tirets)"""
+    slug = text.lower()
+    slug = re.sub(r'[^a-z0-9]+', '-', slug)
+    slug = slug.strip('-')
+    return slug
+
+
+def get_openai_client():
+    """Client OpenAI (créé au premier appel, quitte si la clé API manque)"""
+    global _openai_client
+    if _openai_client is None:
+        api_key = getenv('OPENAI_API_KEY')
+        if not api_key:
+            print("❌ Erreur : La clé API OpenAI n'est pas configurée.")
+            print("   Crée un fichier .env avec : OPENAI_API_KEY=ta-clé-api")
+            sys.exit(1)
+        from openai import OpenAI
+        _openai_client = OpenAI(api_key=api_key)
+    return _openai_client
+
+
+def create_short_link(title, test_mode=False):
+    """Crée un lien raccourci via l'API Ablink"""
+    # En mode test, retourner un lien factice
+    if test_mode:
+        return TEST_SHORT_LINK
+
+    # Enregistré ou rejoué si une cassette est configurée (cassettes.py)
+    import cassettes
+    return cassettes.call('short_link', {'title': title}, lambda: _create_short_link(title))
+
+
+def _create_short_link(title):
+    """Appel réel à l'API Ablink"""
+    # Vérifier que la clé API est configurée
+    api_key = getenv('ABLINK_API_KEY')
+    if not api_key:
+        print("⚠️  Attention : La clé API Ablink n'est pas configurée.")
+        print("   Le lien raccourci ne sera pas généré.")
+        return "Error: Unable to generate link (missing API key)"
+
+    import requests
+    from deadline import call_timeout
+
+    try:
+        # Appeler l'API Ablink pour créer un lien raccourci (délai borné par le budget du post)
+        response = requests.post(
+            ABLINK_API_URL,
+            json={
+                "url": ABLINK_TARGET_URL,
+                "title": title
+            },
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {api_key}"
+            },
+            timeout=call_timeout(SHORT_LINK_TIMEOUT)
+        )
+
+        # Vérifier le status code
+        if response.status_code in (200, 201):
+            data = response.json()
+            slug = data.get('slug')
+            if slug:
+                return f"https://ablink.io/{slug}"
+            print("⚠️  Attention : Réponse API Ablink invalide (slug manquant)")
+            return "Error: Unable to generate link (invalid API response)"
+
+        print(f"⚠️  Attention : Erreur API Ablink (status {response.status_code})")
+        return "Error: Unable to generate link (API error)"
+
+    except (requests.exceptions.Timeout, TimeoutError):
+        print("⚠️  Attention : Timeout lors de l'appel à l'API Ablink")
+        return "Error: Unable to generate link (timeout)"
+    except Exception as e:
+        print(f"⚠️  Attention : Erreur lors de la création du lien raccourci : {e}")
+        return "Error: Unable to generate link"
+
+
+def convert_ps_to_markdown_link(ps_text, link_url):
+    """Convertit [texte] en [texte](lien) dans le texte du PS"""
+    # Remplacer [texte] par [texte](lien)
+    pattern = r'\[([^\]]+)\]'
+    markdown_text = re.sub(pattern, r'[\1](' + link_url + ')', ps_text)
+    return markdown_text
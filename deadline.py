@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Budget de temps d'un post et délais des appels réseau.
+
+Un post s'exécute dans post_budget() : son échéance (POST_BUDGET secondes, défaut 300) est
+portée par une contextvar, elle suit donc les tâches asyncio et asyncio.to_thread. Chaque
+appel réseau prend comme délai le plus petit entre le délai de son étape et le temps restant,
+et échoue tout de suite (TimeoutError) si le budget est épuisé : un post bloqué s'arrête
+au lieu d'attendre indéfiniment. Le temps passé dans paused() (question posée à l'opérateur
+au milieu d'un post) n'est pas décompté.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from core import getenv
+
+DEFAULT_POST_BUDGET = 300
+
+_deadline = contextvars.ContextVar('deadline', default=None)
+
+
+@contextmanager
+def post_budget(seconds=None):
+    """Fixe l'échéance du post pour le bloc (un budget imbriqué ne repousse jamais l'échéance existante)"""
+    if seconds is None:
+        seconds = float(getenv('POST_BUDGET') or DEFAULT_POST_BUDGET)
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def paused():
+    """Suspend le budget pendant le bloc (saisie de l'opérateur) : l'échéance est repoussée du temps passé"""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        deadline = _deadline.get()
+        if deadline is not None:
+            _deadline.set(deadline + time.monotonic() - start)
+
+
+def remaining():
+    """Secondes restantes avant l'échéance (None hors budget)"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def call_timeout(stage_timeout):
+    """Délai d'un appel : délai de l'étape, réduit au temps restant du budget"""
+    left = remaining()
+    if left is None:
+        return stage_timeout
+    if left <= 0:
+        raise TimeoutError("Budget de temps du post épuisé")
+    return min(stage_timeout, left)
+
+
+def call_retries(timeout, retries):
+    """Nouvelles tentatives autorisées : aucune s'il ne reste pas le temps d'un second essai complet"""
+    left = remaining()
+    return retries if left is None or left >= 2 * timeout else 0
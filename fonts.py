@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Polices auto-hébergées pour les posts : Fira Mono et Inter sont téléchargées une fois,
+réduites aux glyphes utilisés (latin + accents français + ponctuation typographique)
+et enregistrées en WOFF2 dans assets/fonts/. static_assets.py les publie ensuite avec le
+bundle CSS, les pages n'ont plus besoin de Google Fonts.
+
+Usage:
+    python fonts.py build                 # télécharge les sources si besoin et génère les WOFF2
+    python fonts.py build --from-posts    # ajoute au sous-ensemble les caractères des posts existants
+
+Dépendances (uniquement pour build) : pip install fonttools brotli
+"""
+
+import argparse
+import os
+import re
+import sys
+from html import unescape
+
+FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'fonts')
+SOURCE_DIR = os.path.join(FONTS_DIR, 'src')
+CHARSET_PATH = os.path.join(FONTS_DIR, 'charset.txt')
+POSTS_DIR = 'posts'
+
+GOOGLE_FONTS_RAW = 'https://github.com/google/fonts/raw/main/ofl'
+
+# Polices utilisées par les pages (famille CSS, graisse, fichier source, axes variables)
+FONTS = [
+    {'family': 'Fira Mono', 'weight': 400, 'name': 'FiraMono-Regular',
+     'source': 'FiraMono-Regular.ttf', 'url': f'{GOOGLE_FONTS_RAW}/firamono/FiraMono-Regular.ttf',
+     'axes': None},
+    {'family': 'Inter', 'weight': 400, 'name': 'Inter-Regular',
+     'source': 'Inter-Variable.ttf', 'url': f'{GOOGLE_FONTS_RAW}/inter/Inter%5Bopsz,wght%5D.ttf',
+     'axes': {'wght': 400, 'opsz': 14}},
+    {'family': 'Inter', 'weight': 700, 'name': 'Inter-Bold',
+     'source': 'Inter-Variable.ttf', 'url': f'{GOOGLE_FONTS_RAW}/inter/Inter%5Bopsz,wght%5D.ttf',
+     'axes': {'wght': 700, 'opsz': 14}},
+]
+
+# Latin de base + lettres accentuées du français + ponctuation typographique courante
+BASE_CHARSET = (
+    ''.join(chr(c) for c in range(0x20, 0x7F))
+    + 'àâäæçéèêëîïôöœùûüÿÀÂÄÆÇÉÈÊËÎÏÔÖŒÙÛÜŸ'
+    + '  ’‘“”«»…–—•€°×'
+)
+
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+def woff2_path(font):
+    """Chemin du fichier WOFF2 généré pour une police"""
+    return os.path.join(FONTS_DIR, f"{font['name']}.woff2")
+
+
+def local_fonts_available():
+    """Vrai si toutes les polices WOFF2 ont été générées"""
+    return all(os.path.exists(woff2_path(font)) for font in FONTS)
+
+
+def _download_sources():
+    """Télécharge les polices sources manquantes dans assets/fonts/src/"""
+    import urllib.request
+
+    os.makedirs(SOURCE_DIR, exist_ok=True)
+    for font in FONTS:
+        source_path = os.path.join(SOURCE_DIR, font['source'])
+        if os.path.exists(source_path):
+            continue
+        print(f"⏳ Téléchargement de {font['source']}...")
+        try:
+            urllib.request.urlretrieve(font['url'], source_path)
+        except Exception as e:
+            print(f"❌ Erreur lors du téléchargement de {font['url']} : {e}")
+            print(f"   Place le fichier manuellement dans {SOURCE_DIR}/{font['source']}")
+            sys.exit(1)
+        print(f"✓ {font['source']} téléchargée")
+
+
+def _posts_charset():
+    """Caractères présents dans le texte des posts déjà générés"""
+    characters = set()
+    for root, _, files in os.walk(POSTS_DIR):
+        for filename in files:
+            if filename.endswith('.html'):
+                with open(os.path.join(root, filename), 'r', encoding='utf-8') as f:
+                    characters.update(unescape(TAG_PATTERN.sub(' ', f.read())))
+    # Les retours à la ligne, tabulations et emojis ne sont pas dessinés avec ces polices
+    return {c for c in characters if c.isprintable() and ord(c) < 0x2500}
+
+
+def build(from_posts=False):
+    """Génère les WOFF2 sous-ensemble dans assets/fonts/"""
+    try:
+        from fontTools import subset
+        from fontTools.ttLib import TTFont
+        from fontTools.varLib import instancer
+    except ImportError:
+        print("❌ Erreur : fonttools n'est pas installé (pip install fonttools brotli)")
+        sys.exit(1)
+
+    _download_sources()
+
+    charset = set(BASE_CHARSET)
+    if from_posts:
+        extra = _posts_charset() - charset
+        if extra:
+            print(f"✓ {len(extra)} caractère(s) ajouté(s) depuis posts/ : {''.join(sorted(extra))}")
+        charset |= extra
+
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['kern', 'liga', 'calt', 'ccmp', 'locl', 'mark', 'mkmk']
+    options.name_IDs = ['*']
+    options.notdef_outline = True
+
+    for font in FONTS:
+        ttfont = TTFont(os.path.join(SOURCE_DIR, font['source']))
+        if font['axes']:
+            # Police variable : on fige la graisse voulue (fichier plus petit, rendu identique)
+            ttfont = instancer.instantiateVariableFont(ttfont, font['axes'])
+
+        subsetter = subset.Subsetter(options=options)
+        subsetter.populate(unicodes=[ord(c) for c in charset])
+        subsetter.subset(ttfont)
+
+        output_path = woff2_path(font)
+        ttfont.flavor = 'woff2'
+        ttfont.save(output_path)
+        print(f"✓ {os.path.relpath(output_path)} ({os.path.getsize(output_path) / 1024:.0f} Ko)")
+
+    with open(CHARSET_PATH, 'w', encoding='utf-8') as f:
+        f.write(''.join(sorted(charset)))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Génère les polices WOFF2 auto-hébergées des posts (assets/fonts/)'
+    )
+    parser.add_argument('command', choices=['build'],
+                        help='build : télécharge, réduit et convertit les polices')
+    parser.add_argument('--from-posts', action='store_true',
+                        help='Ajoute au sous-ensemble les caractères utilisés dans posts/')
+
+    args = parser.parse_args()
+    build(from_posts=args.from_posts)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,81 +4,43 @@ Script pour générer des posts Reddit HTML avec mèmes humoristiques en frança
 Chat interactif avec LLM pour analyser l'image et générer la description.
 """
 
+import asyncio
 import os
 import sys
-import re
-import json
 import random
-import shutil
 from datetime import datetime
-from openai import OpenAI
-from dotenv import load_dotenv
-
-# Charger les variables d'environnement depuis .env
-load_dotenv()
-
-# Variations de post-scriptum promotionnel (réutilisées des autres scripts)
-PS_VARIATIONS = [
-    "PS: If you watch Netflix on your computer and want to support this post, you can check [this tool] that I made.",
-    "PS: If you like watching Netflix and sometimes hesitate between putting the subtitles in French or in your native language, I made a [little tool] that solves this problem",
-    "PS: if you like watching French content on Netflix and sometimes hesitate between putting the subtitles in French or in your native language, I made a little tool called Subly that adjusts the subtitles to your level. If you want to support this post and if you think that this tool could be useful, feel free give it a try by [clicking here] ;)",
-    "PS: if you like watching French content on Netflix and sometimes hesitate between putting the subtitles in French or in your native language, I made a little tool called Subly that I would recommend to use. This extension adjusts the subtitles to your level (if a subtitle is adapted to your level, it displays it in French, if a subtitle is too hard, it displays it in your native language). I use it to learn Portuguese, it provides a good balance between practicing your target language and enjoying the show. Here is [the link to try it].",
-    "How to support these posts: check out [this tool] that I made to learn French with Netflix.",
-    "If you want to improve your French while watching Netflix, here is a [simple tool] I made that decides if a subtitle should be displayed in French or in your Native language based on your level.",
-    "Quick note: If you watch Netflix on your computer, I built a [simple tool] that shows subtitles in French only when the words are familiar to you, otherwise it switches to your native language.",
-    "PS: If you're a Netflix user, I made a [simple tool] that automatically chooses between French and native subtitles depending on the vocabulary you know.",
-    "PS: If you want to learn dozens of new words every time you watch a Netflix show, you can [try my tool called Subly]."
+from core import PS_VARIATIONS, slugify, create_short_link, convert_ps_to_markdown_link
+from llm import chat_completion, chat_candidates
+from deadline import post_budget
+from static_assets import asset_urls, config_json, font_links
+from template_engine import render_template
+from posts_index import build_index
+from image_hash import load_hash_index, find_duplicates, add_to_index
+from image_uploads import start_upload, with_image
+from image_pipeline import load_source_image, encode_image, write_image, resolve_output_format, format_stats, FORMAT_EXTENSIONS
+
+# Subreddits pour humor
+SUBREDDITS = [
+    ("r/FrenchImmersion", "r-frenchimmersion", "https://www.reddit.com/r/FrenchImmersion/"),
+    ("r/learnfrench", "r-learnfrench", "https://www.reddit.com/r/learnfrench/"),
+    ("r/learningfrench", "r-learningfrench", "https://www.reddit.com/r/learningfrench/"),
+    ("r/LearnFrenchWithHumor", "r-learnfrenchwithhumor", "https://www.reddit.com/r/LearnFrenchWithHumor/")
 ]
 
 
-def slugify(text):
-    """Convertit un texte en slug (minuscules, espaces -> tirets)"""
-    slug = text.lower()
-    slug = re.sub(r'[^a-z0-9]+', '-', slug)
-    slug = slug.strip('-')
-    return slug
-
-
-def get_openai_client():
-    """Crée et retourne un client OpenAI"""
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        print("❌ Erreur : La clé API OpenAI n'est pas configurée.")
-        print("   Crée un fichier .env avec : OPENAI_API_KEY=ta-clé-api")
-        sys.exit(1)
-    return OpenAI(api_key=api_key)
-
-
-def encode_image_to_base64(image_path):
-    """Encode une image en base64 pour l'API OpenAI"""
-    import base64
-    with open(image_path, 'rb') as image_file:
-        return base64.b64encode(image_file.read()).decode('utf-8')
-
-
-def analyze_meme(image_path):
-    """Analyse le mème et génère la description complète avec GPT-4o Vision"""
-    client = get_openai_client()
-
-    print("⏳ Analyse de l'image et génération de la description...\n")
-
-    # Encoder l'image en base64
-    base64_image = encode_image_to_base64(image_path)
-
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        temperature=0,
-        messages=[
-            {
-                "role": "system",
-                "content": "You are an expert in French humor and language pedagogy. You analyze French memes and create educational content for English-speaking learners."
-            },
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "text",
-                        "text": """Analyze this French meme and create an educational post for English speakers learning French.
+def analysis_messages(image):
+    """Messages de la demande d'analyse du mème (image : partie image, référence ou data URL)"""
+    return [
+        {
+            "role": "system",
+            "content": "You are an expert in French humor and language pedagogy. You analyze French memes and create educational content for English-speaking learners."
+        },
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": """Analyze this French meme and create an educational post for English speakers learning French.
 
 Your response MUST follow this EXACT format:
 
@@ -101,29 +63,40 @@ IMPORTANT:
 - Simply omit the Vocabulary or Context sections entirely if they are not needed
 
 Keep it concise, educational, and engaging. Use simple English."""
-                    },
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/png;base64,{base64_image}"
-                        }
-                    }
-                ]
-            }
-        ]
-    )
+                },
+                image
+            ]
+        }
+    ]
+
+
+def analyze_meme(source):
+    """Analyse le mème et génère la description complète avec GPT-4o Vision"""
+    # Image téléversée une seule fois (référencée par identifiant dès que l'envoi est fini)
+    response = with_image(source, 'humor_analysis', lambda image: chat_completion(
+        'humor_analysis',
+        temperature=0,
+        messages=analysis_messages(image)
+    ))
 
     return response.choices[0].message.content.strip()
 
 
+def alternative_descriptions(source):
+    """Plusieurs autres descriptions du mème en une seule requête (pour régénérer)"""
+    return with_image(source, 'humor_analysis', lambda image: chat_candidates(
+        'humor_analysis',
+        temperature=0.9,  # Versions différentes de l'analyse déterministe
+        messages=analysis_messages(image)
+    ))
+
+
 def modify_description(current_description, user_instruction):
     """Modifie la description selon les instructions de l'utilisateur"""
-    client = get_openai_client()
-
     print("⏳ Modification de la description...\n")
 
-    response = client.chat.completions.create(
-        model="gpt-4o",
+    response = chat_completion(
+        'humor_modify',
         temperature=0,
         messages=[
             {
@@ -148,774 +121,229 @@ DO NOT use markdown formatting (no bold, no headers with #)."""
     return response.choices[0].message.content.strip()
 
 
-def create_short_link(title, test_mode=False):
-    """Crée un lien raccourci via l'API Ablink"""
-    import requests
-
-    # En mode test, retourner un lien factice
+async def create_short_links(title_slug, test_mode=False):
+    """Crée les 4 liens raccourcis en parallèle (un par subreddit)"""
     if test_mode:
-        return "https://ablink.io/test-link"
-
-    api_key = os.getenv('ABLINK_API_KEY')
-    if not api_key:
-        print("⚠️  Attention : La clé API Ablink n'est pas configurée.")
-        return "Error: Unable to generate link (missing API key)"
-
-    try:
-        response = requests.post(
-            "https://ablink.io/api/links",
-            json={
-                "url": "https://subly-extension.vercel.app/landing",
-                "title": title
-            },
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}"
-            },
-            timeout=10
-        )
-
-        if response.status_code in [200, 201]:
-            data = response.json()
-            slug = data.get('slug')
-            if slug:
-                return f"https://ablink.io/{slug}"
-
-        return "Error: Unable to generate link (API error)"
-
-    except Exception as e:
-        print(f"⚠️  Erreur création lien : {e}")
-        return "Error: Unable to generate link"
+        return [create_short_link("", test_mode=True) for _ in SUBREDDITS]
+    return await asyncio.gather(*(
+        asyncio.to_thread(create_short_link, f"Humor {title_slug} - {subreddit_display}")
+        for subreddit_display, _, __ in SUBREDDITS
+    ))
 
 
-def convert_ps_to_markdown_link(ps_text, link_url):
-    """Convertit [texte] en [texte](lien) dans le texte du PS"""
-    pattern = r'\[([^\]]+)\]'
-    markdown_text = re.sub(pattern, r'[\1](' + link_url + ')', ps_text)
-    return markdown_text
-
-
-def generate_html(description, image_filename, date_str, title_slug, title_display, test_mode=False):
+def generate_html(description, image_filename, date_str, title_slug, title_display, short_links):
     """Génère le HTML avec image + description éditable + tracker 4 subreddits"""
-
     # Sélectionner 4 PS aléatoires différents
     ps_list = random.sample(PS_VARIATIONS, 4)
 
-    # Subreddits pour humor
-    subreddits = [
-        ("r/FrenchImmersion", "r-frenchimmersion", "https://www.reddit.com/r/FrenchImmersion/"),
-        ("r/learnfrench", "r-learnfrench", "https://www.reddit.com/r/learnfrench/"),
-        ("r/learningfrench", "r-learningfrench", "https://www.reddit.com/r/learningfrench/"),
-        ("r/LearnFrenchWithHumor", "r-learnfrenchwithhumor", "https://www.reddit.com/r/LearnFrenchWithHumor/")
-    ]
-
-    # Créer 4 liens raccourcis
-    if test_mode:
-        print(f"\n🧪 Mode test : liens Ablink non créés (liens factices)")
-        short_links = ["https://ablink.io/test-link"] * 4
-    else:
-        print(f"\n⏳ Création des liens raccourcis...")
-        short_links = []
-        for i, (subreddit_display, _, __) in enumerate(subreddits):
-            link_title = f"Humor {title_slug} - {subreddit_display}"
-            short_link = create_short_link(link_title, test_mode=False)
-
-            if short_link.startswith("Error:"):
-                print(f"⚠️  {subreddit_display}: {short_link}")
-            else:
-                print(f"✓ {subreddit_display}: {short_link}")
-
-            short_links.append(short_link)
-
     # Convertir PS en Markdown avec liens
     ps_list_with_links = [
         convert_ps_to_markdown_link(ps_list[i], short_links[i])
         for i in range(4)
     ]
 
-    # Convertir en JSON pour JavaScript
-    ps_json = json.dumps(ps_list_with_links)
-    subreddits_json = json.dumps([name for name, _, __ in subreddits])
-    subreddits_urls_json = json.dumps([url for _, __, url in subreddits])
+    # Configuration du post pour le script partagé (posts/_assets/app.<hash>.js)
+    config = {
+        'storageKey': f"reddit-post-humor-{title_slug}-{date_str}",
+        'subreddits': [name for name, _, __ in SUBREDDITS],
+        'subredditsUrls': [url for _, __, url in SUBREDDITS],
+        'psVariations': ps_list_with_links,
+        'promoSubreddit': 'r/LearnFrenchWithHumor',
+        'copyTextId': 'description',
+        'titleId': 'editable-title',
+        'titlePrefix': 'Learn French with humor: ',
+        'titleSuffix': ' (Joke explained in description)',
+    }
+    assets = asset_urls('posts/humor')
 
     # Chemin relatif de l'image (posts/humor/ vers img/humor/)
     image_relative_path = f"../../img/humor/{image_filename}"
 
-    html_template = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Learn French with humor</title>
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <link href="https://fonts.googleapis.com/css2?family=Fira+Mono:wght@400&family=Inter:wght@400;700&display=swap" rel="stylesheet">
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-
-        body {{
-            font-family: 'Inter', sans-serif;
-            background-color: #f5f5f5;
-            padding: 20px;
-        }}
-
-        .wrapper {{
-            max-width: 700px;
-            margin: 0 auto;
-        }}
-
-        /* LIEN SUBREDDIT */
-        .subreddit-container {{
-            padding: 10px 20px;
-            display: flex;
-            align-items: center;
-            gap: 10px;
-            background-color: white;
-            border-radius: 8px;
-            margin-bottom: 10px;
-        }}
-
-        .subreddit-link {{
-            font-family: 'Inter', sans-serif;
-            font-size: 16px;
-            color: #1976D2;
-            text-decoration: none;
-            flex-grow: 1;
-        }}
-
-        .subreddit-link:hover {{
-            text-decoration: underline;
-        }}
-
-        .copy-link-btn {{
-            background-color: #1976D2;
-            color: white;
-            padding: 6px 12px;
-            font-family: 'Inter', sans-serif;
-            font-size: 14px;
-            font-weight: 500;
-            border: none;
-            border-radius: 4px;
-            cursor: pointer;
-            transition: background-color 0.3s;
-        }}
-
-        .copy-link-btn:hover {{
-            background-color: #1565C0;
-        }}
-
-        .copy-link-btn.copied {{
-            background-color: #4CAF50;
-        }}
-
-        /* TITRE DU POST */
-        .post-title {{
-            background-color: white;
-            padding: 20px;
-            text-align: left;
-            font-family: 'Inter', sans-serif;
-            font-size: 28px;
-            font-weight: 700;
-            color: #000000;
-            margin-bottom: 10px;
-            border-radius: 8px;
-        }}
-
-        .editable-part {{
-            color: #1976D2;
-            border-bottom: 2px dashed #1976D2;
-            padding: 2px 4px;
-            transition: background-color 0.2s;
-        }}
-
-        .editable-part:focus {{
-            outline: none;
-            background-color: #FFF9C4;
-        }}
-
-        .copy-title-btn {{
-            background-color: #4CAF50;
-            color: white;
-            padding: 8px 16px;
-            font-family: 'Inter', sans-serif;
-            font-size: 14px;
-            font-weight: 500;
-            border: none;
-            border-radius: 4px;
-            cursor: pointer;
-            margin: 0 20px 20px 0;
-        }}
-
-        .copy-title-btn:hover {{
-            background-color: #45a049;
-        }}
-
-        .copy-title-btn.copied {{
-            background-color: #2196F3;
-        }}
-
-        /* IMAGE DU MÈME */
-        .meme-container {{
-            background-color: white;
-            padding: 20px;
-            border-radius: 8px;
-            margin-bottom: 20px;
-            text-align: center;
-        }}
-
-        .meme-container img {{
-            max-width: 100%;
-            height: auto;
-            border-radius: 4px;
-        }}
-
-        /* DESCRIPTION */
-        .description {{
-            background-color: white;
-            padding: 20px;
-            border-radius: 8px;
-            margin-bottom: 20px;
-            font-family: 'Inter', sans-serif;
-            font-size: 16px;
-            line-height: 1.6;
-            white-space: pre-wrap;
-        }}
-
-        .copy-btn {{
-            background-color: #4CAF50;
-            color: white;
-            padding: 12px 24px;
-            font-family: 'Inter', sans-serif;
-            font-size: 16px;
-            font-weight: 500;
-            border: none;
-            border-radius: 6px;
-            cursor: pointer;
-            margin-bottom: 20px;
-        }}
-
-        .copy-btn:hover {{
-            background-color: #45a049;
-        }}
-
-        .copy-btn.copied {{
-            background-color: #2196F3;
-        }}
-
-        /* TRACKER */
-        .tracker {{
-            background-color: white;
-            padding: 20px;
-            border-radius: 8px;
-        }}
-
-        .tracker h3 {{
-            font-family: 'Inter', sans-serif;
-            font-size: 18px;
-            margin-bottom: 15px;
-        }}
-
-        .tracker-item {{
-            display: flex;
-            align-items: center;
-            margin-bottom: 10px;
-            gap: 10px;
-        }}
-
-        .tracker-item input[type="checkbox"] {{
-            width: 18px;
-            height: 18px;
-            cursor: pointer;
-        }}
-
-        .tracker-item .label-container {{
-            display: flex;
-            align-items: center;
-            gap: 8px;
-            flex-grow: 1;
-        }}
-
-        .tracker-item .label-text {{
-            cursor: pointer;
-            padding: 8px 12px;
-            border-radius: 6px;
-            border-left: 4px solid transparent;
-            transition: all 0.2s ease;
-            flex-grow: 1;
-            outline: 2px dashed transparent;
-        }}
-
-        .tracker-item .label-text:hover {{
-            background-color: #f5f5f5;
-        }}
-
-        .tracker-item .label-text.selected {{
-            background-color: #E3F2FD;
-            border-left-color: #1976D2;
-            color: #1976D2;
-            font-weight: 500;
-        }}
-
-        .tracker-item .label-text[contenteditable="true"]:focus {{
-            outline: 2px dashed #1976D2;
-            background-color: #FFF9C4;
-            cursor: text;
-        }}
-
-        .tracker-item .edit-btn {{
-            background: none;
-            border: none;
-            font-size: 16px;
-            cursor: pointer;
-            padding: 4px 8px;
-            border-radius: 4px;
-            opacity: 0.6;
-        }}
-
-        .tracker-item .edit-btn:hover {{
-            background-color: #e0e0e0;
-            opacity: 1;
-        }}
-
-        [contenteditable="true"] {{
-            outline: 2px dashed transparent;
-            transition: outline 0.2s;
-        }}
-
-        [contenteditable="true"]:hover {{
-            outline-color: #2196F3;
-        }}
-
-        [contenteditable="true"]:focus {{
-            outline-color: #1976D2;
-            background-color: #f0f8ff;
-        }}
-    </style>
-</head>
-<body>
-    <div class="wrapper">
-        <!-- LIEN SUBREDDIT -->
-        <div class="subreddit-container">
-            <a href="#" class="subreddit-link" id="current-subreddit-link" target="_blank"></a>
-            <button class="copy-link-btn" id="copy-subreddit-link-btn">📋 Copier le lien</button>
-        </div>
-
-        <!-- TITRE DU POST (partie éditable) -->
-        <div class="post-title">
-            Learn French with humor: <span class="editable-part" contenteditable="true" id="editable-title">{title_display}</span> (Joke explained in description)
-        </div>
-        <button class="copy-title-btn" id="copy-title-btn">📋 Copier le titre</button>
-
-        <!-- IMAGE DU MÈME -->
-        <div class="meme-container">
-            <img src="{image_relative_path}" alt="French meme">
-        </div>
-
-        <!-- DESCRIPTION -->
-        <div class="description" contenteditable="true" id="description">{description}</div>
-
-        <!-- PS (dynamique) -->
-        <div class="description" id="ps-text"></div>
-
-        <!-- PROMO SUBREDDIT -->
-        <div class="description" id="ps-subreddit"></div>
-
-        <!-- SIGNATURE -->
-        <div class="description">Happy learning!</div>
-
-        <!-- BOUTON COPIER -->
-        <button class="copy-btn" id="copy-btn">📋 Copier Description + PS</button>
-
-        <!-- TRACKER -->
-        <div class="tracker">
-            <h3>Publication tracker:</h3>
-            <div id="tracker-list"></div>
-        </div>
-    </div>
-
-    <script>
-        // Configuration
-        const TITLE_SLUG = "{title_slug}";
-        const DATE = "{date_str}";
-        const SUBREDDITS = {subreddits_json};
-        const SUBREDDITS_URLS = {subreddits_urls_json};
-        const PS_VARIATIONS = {ps_json};
-        const STORAGE_KEY = `reddit-post-humor-${{TITLE_SLUG}}-${{DATE}}`;
-
-        // État par défaut
-        const DEFAULT_STATE = {{
-            published: [false, false, false, false],
-            selectedSubredditIndex: 0,
-            editedContent: {{}}
-        }};
-
-        // Charger l'état depuis localStorage
-        function loadState() {{
-            const saved = localStorage.getItem(STORAGE_KEY);
-            return saved ? JSON.parse(saved) : DEFAULT_STATE;
-        }}
-
-        // Sauvegarder l'état dans localStorage
-        function saveState(state) {{
-            localStorage.setItem(STORAGE_KEY, JSON.stringify(state));
-        }}
-
-        // Trouver le prochain subreddit non publié
-        function findNextUnpublishedIndex(state) {{
-            const index = state.published.findIndex(pub => pub === false);
-            return index !== -1 ? index : SUBREDDITS.length - 1;
-        }}
-
-        // Sélectionner un subreddit
-        function selectSubreddit(index) {{
-            const state = loadState();
-            state.selectedSubredditIndex = index;
-            saveState(state);
-            updateDisplay(state);
-        }}
-
-        // Mettre à jour l'affichage
-        function updateDisplay(state) {{
-            if (state.published[state.selectedSubredditIndex]) {{
-                state.selectedSubredditIndex = findNextUnpublishedIndex(state);
-                saveState(state);
-            }}
-
-            const selectedIndex = state.selectedSubredditIndex;
-
-            // Mettre à jour le lien du subreddit
-            const subredditLink = document.getElementById('current-subreddit-link');
-            subredditLink.textContent = SUBREDDITS_URLS[selectedIndex];
-            subredditLink.href = SUBREDDITS_URLS[selectedIndex];
-
-            // Mettre à jour le PS
-            const psText = PS_VARIATIONS[selectedIndex];
-            document.getElementById('ps-text').textContent = psText;
-
-            // Mettre à jour le PS promo subreddit
-            const psPrefix = psText.startsWith('PS:') ? 'PS-2:' : 'PS:';
-            document.getElementById('ps-subreddit').textContent = `${{psPrefix}} More posts like this on r/LearnFrenchWithHumor`;
-
-            // Créer/mettre à jour les checkboxes
-            const trackerList = document.getElementById('tracker-list');
-            trackerList.innerHTML = '';
-
-            SUBREDDITS.forEach((subreddit, index) => {{
-                const item = document.createElement('div');
-                item.className = 'tracker-item';
-
-                const checkbox = document.createElement('input');
-                checkbox.type = 'checkbox';
-                checkbox.id = `checkbox-${{index}}`;
-                checkbox.checked = state.published[index];
-                checkbox.addEventListener('change', () => handleCheckboxChange(index));
-
-                const labelContainer = document.createElement('div');
-                labelContainer.className = 'label-container';
-
-                const labelText = document.createElement('span');
-                labelText.id = `tracker-label-${{index}}`;
-                labelText.className = 'label-text';
-                labelText.contentEditable = 'true';
-
-                if (state.editedContent && state.editedContent[`tracker-label-${{index}}`]) {{
-                    labelText.textContent = state.editedContent[`tracker-label-${{index}}`];
-                }} else {{
-                    labelText.textContent = subreddit;
-                }}
-
-                if (index === selectedIndex) {{
-                    labelText.classList.add('selected');
-                }}
-
-                labelText.addEventListener('click', (e) => {{
-                    if (document.activeElement === labelText) {{
-                        return;
-                    }}
-                    e.preventDefault();
-                    selectSubreddit(index);
-                }});
-
-                labelText.addEventListener('focus', (e) => {{
-                    if (!labelText.dataset.editing) {{
-                        labelText.blur();
-                    }}
-                }});
-
-                labelText.addEventListener('blur', () => {{
-                    delete labelText.dataset.editing;
-                    const state = loadState();
-                    if (!state.editedContent) {{
-                        state.editedContent = {{}};
-                    }}
-                    state.editedContent[`tracker-label-${{index}}`] = labelText.textContent;
-                    saveState(state);
-                }});
-
-                labelText.addEventListener('keydown', (e) => {{
-                    if (e.key === 'Enter') {{
-                        e.preventDefault();
-                        labelText.blur();
-                    }}
-                }});
-
-                const editBtn = document.createElement('button');
-                editBtn.className = 'edit-btn';
-                editBtn.textContent = '✏️';
-                editBtn.title = 'Éditer';
-
-                editBtn.addEventListener('click', (e) => {{
-                    e.preventDefault();
-                    e.stopPropagation();
-                    labelText.dataset.editing = 'true';
-                    labelText.focus();
-                    const range = document.createRange();
-                    range.selectNodeContents(labelText);
-                    const selection = window.getSelection();
-                    selection.removeAllRanges();
-                    selection.addRange(range);
-                }});
-
-                labelContainer.appendChild(labelText);
-                labelContainer.appendChild(editBtn);
-
-                item.appendChild(checkbox);
-                item.appendChild(labelContainer);
-                trackerList.appendChild(item);
-            }});
-
-            // Restaurer le contenu édité
-            if (state.editedContent) {{
-                Object.keys(state.editedContent).forEach(id => {{
-                    const element = document.getElementById(id);
-                    if (element) {{
-                        element.textContent = state.editedContent[id];
-                    }}
-                }});
-            }}
-        }}
-
-        // Gérer le changement de checkbox
-        function handleCheckboxChange(index) {{
-            const state = loadState();
-            state.published[index] = !state.published[index];
-
-            if (state.published[index] && index === state.selectedSubredditIndex) {{
-                state.selectedSubredditIndex = findNextUnpublishedIndex(state);
-            }}
-
-            saveState(state);
-            updateDisplay(state);
-        }}
-
-        // Sauvegarder les modifications de contenu éditable
-        function setupContentEditableSaving() {{
-            const editableElements = document.querySelectorAll('[contenteditable="true"]');
-            editableElements.forEach(element => {{
-                element.addEventListener('blur', () => {{
-                    const state = loadState();
-                    if (!state.editedContent) {{
-                        state.editedContent = {{}};
-                    }}
-                    state.editedContent[element.id] = element.textContent;
-                    saveState(state);
-                }});
-            }});
-        }}
-
-        // Copier description + PS
-        function setupCopyButton() {{
-            const copyBtn = document.getElementById('copy-btn');
-            copyBtn.addEventListener('click', async () => {{
-                const description = document.getElementById('description').textContent;
-                const ps = document.getElementById('ps-text').textContent;
-                const psSubreddit = document.getElementById('ps-subreddit').textContent;
-                const textToCopy = description + '\\n\\n' + ps + '\\n\\n' + psSubreddit + '\\n\\nHappy learning!';
-
-                try {{
-                    await navigator.clipboard.writeText(textToCopy);
-                    const originalText = copyBtn.textContent;
-                    copyBtn.textContent = '✅ Copié !';
-                    copyBtn.classList.add('copied');
-                    setTimeout(() => {{
-                        copyBtn.textContent = originalText;
-                        copyBtn.classList.remove('copied');
-                    }}, 2000);
-                }} catch (err) {{
-                    console.error('Erreur lors de la copie:', err);
-                    copyBtn.textContent = '❌ Erreur';
-                    setTimeout(() => {{
-                        copyBtn.textContent = '📋 Copier Description + PS';
-                    }}, 2000);
-                }}
-            }});
-        }}
-
-        // Copier le titre
-        function setupCopyTitleButton() {{
-            const copyTitleBtn = document.getElementById('copy-title-btn');
-            copyTitleBtn.addEventListener('click', async () => {{
-                const staticPart = 'Learn French with humor: ';
-                const editablePart = document.getElementById('editable-title').textContent;
-                const suffix = ' (Joke explained in description)';
-                const fullTitle = staticPart + editablePart + suffix;
-
-                try {{
-                    await navigator.clipboard.writeText(fullTitle);
-                    const originalText = copyTitleBtn.textContent;
-                    copyTitleBtn.textContent = '✅ Copié !';
-                    copyTitleBtn.classList.add('copied');
-                    setTimeout(() => {{
-                        copyTitleBtn.textContent = originalText;
-                        copyTitleBtn.classList.remove('copied');
-                    }}, 2000);
-                }} catch (err) {{
-                    console.error('Erreur lors de la copie:', err);
-                    copyTitleBtn.textContent = '❌ Erreur';
-                    setTimeout(() => {{
-                        copyTitleBtn.textContent = '📋 Copier le titre';
-                    }}, 2000);
-                }}
-            }});
-        }}
-
-        // Copier le lien du subreddit
-        function setupCopySubredditLinkButton() {{
-            const copySubredditLinkBtn = document.getElementById('copy-subreddit-link-btn');
-            copySubredditLinkBtn.addEventListener('click', async () => {{
-                const state = loadState();
-                const selectedIndex = state.selectedSubredditIndex;
-                const subredditUrl = SUBREDDITS_URLS[selectedIndex];
-
-                try {{
-                    await navigator.clipboard.writeText(subredditUrl);
-                    const originalText = copySubredditLinkBtn.textContent;
-                    copySubredditLinkBtn.textContent = '✅ Copié !';
-                    copySubredditLinkBtn.classList.add('copied');
-                    setTimeout(() => {{
-                        copySubredditLinkBtn.textContent = originalText;
-                        copySubredditLinkBtn.classList.remove('copied');
-                    }}, 2000);
-                }} catch (err) {{
-                    console.error('Erreur lors de la copie:', err);
-                    copySubredditLinkBtn.textContent = '❌ Erreur';
-                    setTimeout(() => {{
-                        copySubredditLinkBtn.textContent = '📋 Copier le lien';
-                    }}, 2000);
-                }}
-            }});
-        }}
-
-        // Initialisation
-        document.addEventListener('DOMContentLoaded', () => {{
-            const state = loadState();
-            updateDisplay(state);
-            setupContentEditableSaving();
-            setupCopyButton();
-            setupCopyTitleButton();
-            setupCopySubredditLinkButton();
-        }});
-    </script>
-</body>
-</html>"""
-
-    return html_template
-
-
-def main(test_mode=False):
-    """Workflow interactif principal"""
-
-    print("=" * 60)
-    print("😄 GÉNÉRATEUR DE POSTS HUMOUR FRANÇAIS")
-    if test_mode:
-        print("🧪 MODE TEST (pas de liens Ablink)")
-    print("=" * 60)
-    print()
-
-    # Vérifier les arguments
-    if len(sys.argv) < 2:
-        print("❌ Erreur : Aucune image fournie")
-        print("Usage : python3 generate_humor.py --image <chemin_image> [--test]")
-        sys.exit(1)
-
-    # Parser les arguments
-    image_path = None
-    for i, arg in enumerate(sys.argv):
-        if arg == '--image' and i + 1 < len(sys.argv):
-            image_path = sys.argv[i + 1]
-            break
+    return render_template(
+        'humor.html',
+        page_title='Learn French with humor',
+        font_links=font_links("https://fonts.googleapis.com/css2?family=Fira+Mono:wght@400&family=Inter:wght@400;700&display=swap"),
+        css_url=assets['css'],
+        js_url=assets['js'],
+        body_class='post-card',
+        text_class='description',
+        copy_label='📋 Copier Description + PS',
+        config_json=config_json(config),
+        title_display=title_display,
+        image_path=image_relative_path,
+        description=description
+    )
 
-    if not image_path:
-        print("❌ Erreur : Vous devez spécifier une image avec --image")
-        print("Usage : python3 generate_humor.py --image <chemin_image> [--test]")
-        sys.exit(1)
 
-    # Vérifier que l'image existe
-    if not os.path.exists(image_path):
-        print(f"❌ Erreur : L'image '{image_path}' n'existe pas")
-        sys.exit(1)
+async def ask(prompt):
+    """input() dans un thread : les tâches en arrière-plan continuent pendant la saisie"""
+    return (await asyncio.to_thread(input, prompt)).strip()
 
-    # Étape 1 : Analyser l'image et générer la description
-    description = analyze_meme(image_path)
 
-    # Boucle de modification de la description
+async def review_description(source, description):
+    """Boucle de validation / modification de la description par l'opérateur"""
+    # Versions générées d'avance par régénérer, proposées une par une sans nouvel appel
+    alternatives = []
     while True:
         print("\n" + "─" * 60)
         print("📝 DESCRIPTION GÉNÉRÉE :\n")
         print(description)
         print("─" * 60)
 
-        modify_choice = input("\nC'est bon ? (oui/modifier/régénérer) : ").strip().lower()
+        modify_choice = (await ask("\nC'est bon ? (oui/modifier/régénérer) : ")).lower()
 
         if modify_choice == 'oui':
-            break
+            return description
         elif modify_choice == 'régénérer':
-            description = analyze_meme(image_path)
+            if not alternatives:
+                print("⏳ Analyse de l'image et génération de nouvelles descriptions...\n")
+                candidates = await asyncio.to_thread(alternative_descriptions, source)
+                alternatives = [text for text in candidates if text != description]
+            if alternatives:
+                description = alternatives.pop(0)
+                print(f"🔄 Nouvelle version ({len(alternatives)} autre(s) en réserve)")
+            else:
+                print("⚠️  Aucune version différente générée, réessaie ou modifie la description.")
         elif modify_choice == 'modifier':
-            instruction = input("\nQu'est-ce que tu veux changer ? : ").strip()
+            instruction = await ask("\nQu'est-ce que tu veux changer ? : ")
             if instruction:
-                description = modify_description(description, instruction)
+                description = await asyncio.to_thread(modify_description, description, instruction)
         else:
             print("⚠️  Réponse invalide. Tapez 'oui', 'modifier' ou 'régénérer'.")
 
-    # Étape 2 : Demander un titre pour le slug
-    print("\n" + "─" * 60)
-    title_input = input("Donne un titre court pour le fichier (ex: 'la-pilule', 'monument', etc.) : ").strip()
-    title_slug = slugify(title_input) if title_input else "humor-post"
-
-    # Étape 3 : Générer le fichier HTML
-    print("\n⏳ Génération du fichier HTML...")
 
+async def run_pipeline(image_path, output_format, test_mode=False):
+    """Pipeline du post : le travail indépendant de l'opérateur démarre dès que possible, en parallèle"""
+    # Lire et décoder l'image une seule fois
+    source = load_source_image(image_path)
+    if not output_format:
+        output_format = source['format'].lower()
+        image_extension = os.path.splitext(image_path)[1]
+    else:
+        image_extension = FORMAT_EXTENSIONS[output_format]
+
+    # Démarrent tout de suite : encodage de l'image et vérification des doublons
+    encoding = asyncio.create_task(asyncio.to_thread(encode_image, source, output_format, 'humor'))
+    hash_index = await asyncio.to_thread(load_hash_index)
+    duplicates = find_duplicates(hash_index, source['image'])
+
+    # Vérifier que ce mème n'a pas déjà été publié (avant l'appel à GPT-4o, quelques ms grâce au cache)
+    if duplicates:
+        distance, path = duplicates[0]
+        print(f"⚠️  Attention : ce mème ressemble à une image déjà publiée : {path} (distance {distance})")
+        if await ask("Continuer quand même ? (oui/non) : ") != 'oui':
+            encoding.cancel()
+            print("\n👋 À bientôt !")
+            return
+
+    # Après la vérification des doublons : l'image part dans l'API Files pour les requêtes suivantes
+    # (régénérer) ; pas en mode test
+    if not test_mode:
+        start_upload(source)
+
+    # Étape 1 : Analyse GPT-4o en arrière-plan (budget de temps propre, la saisie de l'opérateur n'y compte pas)
+    print("⏳ Analyse de l'image et génération de la description (en arrière-plan)...\n")
+    with post_budget():
+        analysis = asyncio.create_task(asyncio.to_thread(analyze_meme, source))
+
+    # Étape 2 : Titre demandé pendant l'analyse (il fixe le nom des fichiers et le titre des liens)
+    title_input = await ask("Donne un titre court pour le fichier (ex: 'la-pilule', 'monument', etc.) : ")
+    title_slug = slugify(title_input) if title_input else "humor-post"
     date_str = datetime.now().strftime('%Y-%m-%d')
 
-    # Créer les dossiers si nécessaire
-    os.makedirs('posts/humor', exist_ok=True)
-    os.makedirs('img/humor', exist_ok=True)
-
-    # Copier l'image dans img/humor/
-    image_extension = os.path.splitext(image_path)[1]
+    # Liens raccourcis et enregistrement de l'image pendant l'analyse et la relecture
+    with post_budget():
+        links = asyncio.create_task(create_short_links(title_slug, test_mode=test_mode))
     image_filename = f"{title_slug}-{date_str}{image_extension}"
     image_destination = f"img/humor/{image_filename}"
-    shutil.copy(image_path, image_destination)
-    print(f"✓ Image copiée : {image_destination}")
 
-    # Générer le HTML
-    html_content = generate_html(description, image_filename, date_str, title_slug, title_input, test_mode=test_mode)
+    async def store():
+        data, stats = await encoding
+        os.makedirs('img/humor', exist_ok=True)
+        await asyncio.to_thread(write_image, data, stats, image_destination)
+        await asyncio.to_thread(add_to_index, hash_index, image_destination)
+        return stats
+
+    storing = asyncio.create_task(store())
+
+    # Étape 3 : Relecture de la description par l'opérateur
+    try:
+        description = await analysis
+    except Exception as e:
+        # Analyse indispensable : les tâches en cours (liens, image) sont annulées, rien n'est écrit
+        for task in (links, storing, encoding):
+            task.cancel()
+        print(f"❌ Erreur lors de l'analyse du mème : {e}")
+        sys.exit(1)
+    description = await review_description(source, description)
+
+    # Étape 4 : Tout le reste est déjà prêt, le HTML est écrit immédiatement
+    stats = await storing
+    print(f"\n✓ Image enregistrée : {image_destination} ({format_stats(stats)})")
+
+    short_links = await links
+    if test_mode:
+        print(f"🧪 Mode test : liens Ablink non créés (liens factices)")
+    else:
+        for (subreddit_display, _, __), short_link in zip(SUBREDDITS, short_links):
+            if short_link.startswith("Error:"):
+                print(f"⚠️  {subreddit_display}: {short_link}")
+            else:
+                print(f"✓ {subreddit_display}: {short_link}")
+
+    os.makedirs('posts/humor', exist_ok=True)
+    html_content = generate_html(description, image_filename, date_str, title_slug, title_input, short_links)
     output_filename = f"posts/humor/{title_slug}-{date_str}.html"
 
     with open(output_filename, 'w', encoding='utf-8') as f:
         f.write(html_content)
 
     print(f"\n✅ Fichier HTML créé : {output_filename}")
+    build_index()
     print(f"   Tu peux maintenant l'ouvrir dans ton navigateur pour éditer le titre et publier !")
 
     print("\n👋 À bientôt !")
 
 
+def main(test_mode=False, argv=None):
+    """Workflow interactif principal"""
+    print("=" * 60)
+    print("😄 GÉNÉRATEUR DE POSTS HUMOUR FRANÇAIS")
+    if test_mode:
+        print("🧪 MODE TEST (pas de liens Ablink)")
+    print("=" * 60)
+    print()
+
+    # Vérifier les arguments
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv:
+        print("❌ Erreur : Aucune image fournie")
+        print("Usage : python3 generate_humor.py --image <chemin_image> [--format png|webp|avif] [--test]")
+        sys.exit(1)
+
+    # Parser les arguments
+    image_path = None
+    output_format = None
+    for i, arg in enumerate(argv):
+        if arg == '--image' and i + 1 < len(argv):
+            image_path = argv[i + 1]
+        elif arg == '--format' and i + 1 < len(argv):
+            output_format = resolve_output_format(argv[i + 1])
+
+    if not image_path:
+        print("❌ Erreur : Vous devez spécifier une image avec --image")
+        print("Usage : python3 generate_humor.py --image <chemin_image> [--format png|webp|avif] [--test]")
+        sys.exit(1)
+
+    # Vérifier que l'image existe
+    if not os.path.exists(image_path):
+        print(f"❌ Erreur : L'image '{image_path}' n'existe pas")
+        sys.exit(1)
+
+    asyncio.run(run_pipeline(image_path, output_format, test_mode=test_mode))
+
+
 if __name__ == '__main__':
     import sys
     # Vérifier si --test est passé en argument
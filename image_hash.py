@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Détection de doublons par hash perceptuel (pHash 64 bits) sur les images déjà publiées.
+Les hashs de img/ et img/humor/ sont mis en cache dans img/.phash-index.json et chargés
+dans un index multiple (multi-index hashing) pour des recherches par distance de Hamming
+en moins d'une milliseconde.
+"""
+
+import json
+import os
+from functools import lru_cache
+from PIL import Image
+
+INDEX_PATH = 'img/.phash-index.json'
+IMAGE_DIRS = ['img', 'img/humor']
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.avif', '.gif')
+
+# Distance de Hamming maximale (sur 64 bits) pour considérer deux images comme identiques
+DUPLICATE_DISTANCE = 8
+
+HASH_SIZE = 8
+HASH_RESAMPLE_SIZE = 32
+
+# Index multiple : le hash est découpé en 4 morceaux de 16 bits, chacun indexé dans sa table
+HASH_CHUNKS = 4
+CHUNK_BITS = 16
+
+
+@lru_cache(maxsize=None)
+def _dct_matrix(size):
+    """Matrice de la DCT-II orthonormée (calculée une seule fois)"""
+    import numpy as np
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size))
+    matrix[0] /= np.sqrt(2)
+    return matrix * np.sqrt(2 / size)
+
+
+def perceptual_hash(image):
+    """Calcule le pHash 64 bits d'une image PIL (DCT des basses fréquences)"""
+    # NumPy n'est importé qu'au premier hash (démarrage rapide des scripts)
+    import numpy as np
+    dct = _dct_matrix(HASH_RESAMPLE_SIZE)
+    small = image.convert('L').resize((HASH_RESAMPLE_SIZE, HASH_RESAMPLE_SIZE), Image.LANCZOS)
+    pixels = np.asarray(small, dtype=np.float64)
+    coefficients = (dct @ pixels @ dct.T)[:HASH_SIZE, :HASH_SIZE].flatten()
+    # La composante continue (coefficient 0) est exclue du calcul de la médiane
+    bits = coefficients > np.median(coefficients[1:])
+    return int(''.join('1' if bit else '0' for bit in bits), 2)
+
+
+def hamming_distance(hash1, hash2):
+    """Nombre de bits différents entre deux hashs"""
+    return bin(hash1 ^ hash2).count('1')
+
+
+def _chunks(image_hash):
+    """Découpe un hash 64 bits en HASH_CHUNKS morceaux de CHUNK_BITS bits"""
+    mask = (1 << CHUNK_BITS) - 1
+    return [(image_hash >> (CHUNK_BITS * i)) & mask for i in range(HASH_CHUNKS)]
+
+
+def _flip_masks(bits, radius):
+    """Tous les masques de bits bits ayant au plus radius bits à 1"""
+    masks = [0]
+    for _ in range(radius):
+        masks = sorted(set(masks) | {mask | (1 << bit) for mask in masks for bit in range(bits)})
+    return masks
+
+
+_CHUNK_MASKS = _flip_masks(CHUNK_BITS, DUPLICATE_DISTANCE // HASH_CHUNKS)
+
+
+def index_add(tables, image_hash, path):
+    """Ajoute un hash dans les tables d'index multiple (une table par morceau du hash)"""
+    for table, chunk in zip(tables, _chunks(image_hash)):
+        table.setdefault(chunk, []).append((image_hash, path))
+
+
+def index_search(tables, image_hash, max_distance=DUPLICATE_DISTANCE):
+    """Retourne les (distance, chemin) à moins de max_distance du hash, triés par distance"""
+    # Principe des tiroirs : si distance <= max_distance, au moins un des HASH_CHUNKS morceaux
+    # diffère de max_distance // HASH_CHUNKS bits au plus, il suffit de sonder ces voisins
+    masks = _CHUNK_MASKS if max_distance == DUPLICATE_DISTANCE else _flip_masks(CHUNK_BITS, max_distance // HASH_CHUNKS)
+    found = {}
+    for table, chunk in zip(tables, _chunks(image_hash)):
+        for mask in masks:
+            for candidate_hash, path in table.get(chunk ^ mask, ()):
+                if path not in found:
+                    distance = hamming_distance(image_hash, candidate_hash)
+                    if distance <= max_distance:
+                        found[path] = distance
+    return sorted((distance, path) for path, distance in found.items())
+
+
+# Index chargé dans ce processus (réutilisé d'un post à l'autre)
+_loaded_index = None
+
+
+def _list_images():
+    """Liste les images publiées dans img/ et img/humor/"""
+    paths = []
+    for directory in IMAGE_DIRS:
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(directory, filename))
+    return paths
+
+
+def _save_index(entries):
+    """Écrit le cache des hashs sur disque"""
+    os.makedirs(os.path.dirname(INDEX_PATH), exist_ok=True)
+    with open(INDEX_PATH, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, indent=1)
+
+
+def load_hash_index():
+    """Charge le cache des hashs, rehashe uniquement les images nouvelles ou modifiées, construit l'index"""
+    global _loaded_index
+    entries = {}
+    if _loaded_index is not None:
+        # Session longue (cli.py shell) : l'index en mémoire remplace la relecture du cache
+        entries = _loaded_index['entries']
+    elif os.path.exists(INDEX_PATH):
+        try:
+            with open(INDEX_PATH, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+
+    changed = False
+    current = {}
+    for path in _list_images():
+        mtime = os.path.getmtime(path)
+        entry = entries.get(path)
+        if entry is None or entry['mtime'] != mtime:
+            try:
+                with Image.open(path) as image:
+                    entry = {'mtime': mtime, 'phash': f"{perceptual_hash(image):016x}"}
+            except Exception as e:
+                print(f"⚠️  Attention : Impossible de hasher {path} : {e}")
+                continue
+            changed = True
+        current[path] = entry
+
+    if changed or len(current) != len(entries):
+        _save_index(current)
+    elif _loaded_index is not None:
+        return _loaded_index
+
+    tables = [{} for _ in range(HASH_CHUNKS)]
+    for path, entry in current.items():
+        index_add(tables, int(entry['phash'], 16), path)
+
+    _loaded_index = {'entries': current, 'tables': tables}
+    return _loaded_index
+
+
+def find_duplicates(index, image, max_distance=DUPLICATE_DISTANCE):
+    """Cherche les images déjà publiées proches de l'image donnée"""
+    return index_search(index['tables'], perceptual_hash(image), max_distance)
+
+
+def add_to_index(index, path):
+    """Ajoute une image nouvellement enregistrée à l'index (mémoire + disque)"""
+    try:
+        with Image.open(path) as image:
+            image_hash = perceptual_hash(image)
+    except Exception as e:
+        print(f"⚠️  Attention : Impossible de hasher {path} : {e}")
+        return
+    index['entries'][path] = {'mtime': os.path.getmtime(path), 'phash': f"{image_hash:016x}"}
+    index_add(index['tables'], image_hash, path)
+    _save_index(index['entries'])
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Pipeline d'images en mémoire : chaque image source est lue et décodée une seule fois,
+puis partagée entre l'encodage base64 pour l'API Vision et le rognage/enregistrement.
+"""
+
+import base64
+import io
+import os
+import sys
+import time
+from PIL import Image, features
+from image_store import store_image
+
+# Extensions et types MIME par format de sortie
+FORMAT_EXTENSIONS = {
+    'png': '.png',
+    'webp': '.webp',
+    'avif': '.avif',
+}
+
+MIME_TYPES = {
+    'PNG': 'image/png',
+    'JPEG': 'image/jpeg',
+    'WEBP': 'image/webp',
+    'GIF': 'image/gif',
+    'AVIF': 'image/avif',
+}
+
+# Réglages d'encodage par type de post :
+# - vocab : captures de films (photo), une compression avec pertes légère est invisible
+# - humor : mèmes avec beaucoup de texte, on reste sans pertes pour garder les lettres nettes
+ENCODER_PRESETS = {
+    'vocab': {
+        'png': {'compress_level': 6},
+        'webp': {'lossless': False, 'quality': 90, 'method': 4},
+        'avif': {'quality': 80, 'speed': 6},
+    },
+    'humor': {
+        'png': {'optimize': True},
+        'webp': {'lossless': True, 'quality': 80, 'method': 4},
+        'avif': {'quality': 95, 'speed': 6},
+    },
+}
+
+# Détection de la bande d'incrustation en bas des captures (titre du film, watermark)
+DEFAULT_BAND_HEIGHT = 40  # hauteur historique de la bande sur une capture à 72 dpi
+BAND_SEARCH_FACTOR = 3  # on cherche la bande dans les 3 × DEFAULT_BAND_HEIGHT derniers pixels
+BAND_MIN_HEIGHT = 8  # une bande plus fine que ça n'est pas une incrustation
+BAND_EDGE_FACTOR = 4.0  # le bord de la bande doit ressortir nettement du reste de la zone
+BAND_MIN_CONTRAST = 12.0  # contraste minimal (niveaux de gris) entre la bande et l'image
+BAND_COLUMN_STEP = 4  # sous-échantillonnage horizontal (les lignes restent complètes)
+
+
+def load_source_image(image_path):
+    """Lit une image une seule fois (octets bruts + image décodée)"""
+    if not os.path.exists(image_path):
+        print(f"❌ Erreur : Image introuvable : {image_path}")
+        sys.exit(1)
+
+    with open(image_path, 'rb') as image_file:
+        raw = image_file.read()
+
+    try:
+        image = Image.open(io.BytesIO(raw))
+        image.load()
+    except Exception as e:
+        print(f"❌ Erreur : Impossible de décoder l'image {image_path} : {e}")
+        sys.exit(1)
+
+    return {
+        'path': image_path,
+        'raw': raw,
+        'image': image,
+        'format': image.format or 'PNG',
+        'data_url': None,
+        'band': None,
+        'band_data_url': None,
+        # Envoi dans l'API Files (image_uploads.py) : None, Future de l'identifiant, ou False si indisponible
+        'upload': None,
+    }
+
+
+def image_to_data_url(source):
+    """Retourne l'URL data: base64 de l'image source (calculée une seule fois)"""
+    if source['data_url'] is None:
+        mime_type = MIME_TYPES.get(source['format'], 'image/png')
+        base64_image = base64.b64encode(source['raw']).decode('utf-8')
+        source['data_url'] = f"data:{mime_type};base64,{base64_image}"
+    return source['data_url']
+
+
+def estimate_scale(source):
+    """Estime le facteur d'échelle de la capture (2 pour une capture Retina à 144 dpi)"""
+    dpi = source['image'].info.get('dpi')
+    if dpi and dpi[0]:
+        return max(1.0, round(float(dpi[0]) / 72))
+    return 1.0
+
+
+def detect_bottom_band(source):
+    """Détecte la hauteur de la bande d'incrustation en bas de l'image par analyse des lignes"""
+    if source['band'] is not None:
+        return source['band']
+
+    start = time.perf_counter()
+    image = source['image']
+    width, height = image.size
+    scale = estimate_scale(source)
+    fallback = min(int(DEFAULT_BAND_HEIGHT * scale), height - 1)
+    min_height = int(BAND_MIN_HEIGHT * scale)
+    window = min(int(DEFAULT_BAND_HEIGHT * scale * BAND_SEARCH_FACTOR), height)
+
+    # NumPy n'est importé que pour la détection (démarrage rapide des scripts)
+    import numpy as np
+
+    # Seule la zone du bas est convertie en niveaux de gris puis analysée
+    region = image.crop((0, height - window, width, height)).convert('L')
+    pixels = np.asarray(region, dtype=np.float32)[:, ::BAND_COLUMN_STEP]
+    row_mean = pixels.mean(axis=1)
+    row_std = pixels.std(axis=1)
+
+    # Contraste entre deux lignes consécutives (luminance moyenne + texture)
+    edges = np.abs(np.diff(row_mean)) + np.abs(np.diff(row_std))
+    candidates = edges[:len(edges) - min_height + 1] if min_height > 1 else edges
+
+    band_height = fallback
+    detected = False
+    if len(candidates) > 0:
+        best = int(np.argmax(candidates))
+        strength = float(candidates[best])
+        baseline = float(np.median(edges)) + 1e-6
+        if strength >= BAND_MIN_CONTRAST and strength >= BAND_EDGE_FACTOR * baseline:
+            band_height = window - (best + 1)
+            detected = True
+
+    source['band'] = {
+        'height': band_height,
+        'detected': detected,
+        'ms': (time.perf_counter() - start) * 1000,
+    }
+    return source['band']
+
+
+def band_data_url(source):
+    """Retourne l'URL data: de la zone de la bande (région d'intérêt pour la lecture du titre)"""
+    band = detect_bottom_band(source)
+    if not band['detected']:
+        return image_to_data_url(source)
+
+    if source['band_data_url'] is None:
+        image = source['image']
+        width, height = image.size
+        # Marge au-dessus de la bande pour ne pas couper un titre sur deux lignes
+        top = max(0, height - band['height'] * 2)
+        buffer = io.BytesIO()
+        image.crop((0, top, width, height)).save(buffer, format='PNG', compress_level=1)
+        base64_image = base64.b64encode(buffer.getvalue()).decode('utf-8')
+        source['band_data_url'] = f"data:image/png;base64,{base64_image}"
+    return source['band_data_url']
+
+
+def resolve_output_format(output_format):
+    """Vérifie que le format demandé est supporté par Pillow, sinon repli sur PNG"""
+    if output_format not in FORMAT_EXTENSIONS:
+        print(f"⚠️  Attention : Format '{output_format}' inconnu, utilisation de PNG")
+        return 'png'
+    if output_format != 'png' and not features.check(output_format):
+        print(f"⚠️  Attention : Pillow n'a pas le support {output_format.upper()}, utilisation de PNG")
+        return 'png'
+    return output_format
+
+
+def resolve_crop(source, pixels_to_remove=None):
+    """Nombre de pixels à rogner en bas (bande détectée si None, 0 si le rognage est impossible)"""
+    height = source['image'].size[1]
+
+    # Rognage adaptatif : hauteur de la bande détectée automatiquement
+    if pixels_to_remove is None:
+        pixels_to_remove = detect_bottom_band(source)['height']
+
+    if pixels_to_remove >= height:
+        print(f"⚠️  Attention : Impossible de rogner {pixels_to_remove}px sur une image de {height}px de hauteur")
+        return 0
+    return pixels_to_remove
+
+
+def cropped_image(source, pixels_to_remove=None):
+    """Retourne l'image source décodée sans sa bande du bas"""
+    pixels_to_remove = resolve_crop(source, pixels_to_remove)
+    image = source['image']
+    if pixels_to_remove == 0:
+        return image
+    width, height = image.size
+    return image.crop((0, 0, width, height - pixels_to_remove))
+
+
+def encode_image(source, output_format='png', post_type='vocab', pixels_to_remove=0):
+    """Rogne (optionnel) et encode l'image source déjà décodée, retourne (octets, statistiques)"""
+    pixels_to_remove = resolve_crop(source, pixels_to_remove)
+
+    start = time.perf_counter()
+
+    same_format = source['format'].lower() == output_format
+    if pixels_to_remove == 0 and same_format:
+        # Rien à transformer : on réécrit les octets d'origine sans ré-encoder
+        data = source['raw']
+    else:
+        image = cropped_image(source, pixels_to_remove)
+        options = ENCODER_PRESETS.get(post_type, ENCODER_PRESETS['vocab'])[output_format]
+        buffer = io.BytesIO()
+        image.save(buffer, format=output_format.upper(), **options)
+        data = buffer.getvalue()
+
+    return data, {
+        'bytes_in': len(source['raw']),
+        'bytes_out': len(data),
+        'encode_ms': (time.perf_counter() - start) * 1000,
+    }
+
+
+def write_image(data, stats, output_path):
+    """Écrit une image encodée dans le store et complète les statistiques"""
+    # Stockage par contenu : une image identique déjà publiée n'est pas réécrite
+    stats['deduplicated'] = store_image(data, output_path)
+    return stats
+
+
+def save_image(source, output_path, output_format='png', post_type='vocab', pixels_to_remove=0):
+    """Rogne (optionnel) et encode l'image source déjà décodée, retourne les statistiques"""
+    data, stats = encode_image(source, output_format, post_type, pixels_to_remove)
+    return write_image(data, stats, output_path)
+
+
+def format_stats(stats):
+    """Formate les statistiques d'encodage pour l'affichage console"""
+    saved = stats['bytes_in'] - stats['bytes_out']
+    percent = (saved / stats['bytes_in'] * 100) if stats['bytes_in'] else 0
+    text = (f"{stats['bytes_in'] / 1024:.0f} Ko → {stats['bytes_out'] / 1024:.0f} Ko "
+            f"({percent:.0f}% économisés), encodage {stats['encode_ms']:.0f} ms")
+    if stats.get('deduplicated'):
+        text += ", déjà présente dans img/store/"
+    return text
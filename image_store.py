@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Stockage des images par contenu : chaque image est écrite une seule fois sous
+img/store/<xx>/<sha256>.<ext>, et les noms lisibles (img/slug-date-scene1.png,
+img/humor/slug-date.png) sont des liens physiques (ou symboliques) vers ce fichier.
+
+Usage:
+    python image_store.py gc [--dry-run]       # supprime les images qui ne sont plus utilisées par aucun post
+    python image_store.py migrate [--dry-run]  # déplace les images existantes dans le store
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+STORE_DIR = 'img/store'
+NAME_DIRS = ['img', 'img/humor']
+POSTS_DIR = 'posts'
+
+# Chemins d'images référencés dans le HTML des posts (../img/... ou ../../img/humor/...)
+IMAGE_REFERENCE_PATTERN = re.compile(r'(?:\.\./)+(img/[^"\'()\s]+)')
+
+
+def blob_path_for(data, extension):
+    """Chemin du blob correspondant au contenu (sha256)"""
+    digest = hashlib.sha256(data).hexdigest()
+    return os.path.join(STORE_DIR, digest[:2], f"{digest}{extension}")
+
+
+def _link(blob_path, name_path):
+    """Crée le nom lisible : lien physique, sinon lien symbolique, sinon copie"""
+    if os.path.lexists(name_path):
+        os.remove(name_path)
+    try:
+        os.link(blob_path, name_path)
+    except OSError:
+        try:
+            os.symlink(os.path.relpath(blob_path, os.path.dirname(name_path) or '.'), name_path)
+        except OSError:
+            shutil.copy(blob_path, name_path)
+
+
+def store_image(data, name_path):
+    """Écrit l'image dans le store (si absente) et crée son nom lisible, retourne True si déjà stockée"""
+    extension = os.path.splitext(name_path)[1].lower()
+    blob_path = blob_path_for(data, extension)
+    already_stored = os.path.exists(blob_path)
+
+    if not already_stored:
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        # Écriture atomique : un blob est toujours complet ou absent
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(blob_path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, blob_path)
+
+    os.makedirs(os.path.dirname(name_path) or '.', exist_ok=True)
+    _link(blob_path, name_path)
+    return already_stored
+
+
+def _list_blobs():
+    """Liste les blobs du store"""
+    blobs = []
+    if not os.path.isdir(STORE_DIR):
+        return blobs
+    for prefix in sorted(os.listdir(STORE_DIR)):
+        prefix_dir = os.path.join(STORE_DIR, prefix)
+        if os.path.isdir(prefix_dir):
+            blobs.extend(os.path.join(prefix_dir, name) for name in sorted(os.listdir(prefix_dir)))
+    return blobs
+
+
+def _list_names():
+    """Liste les noms lisibles (fichiers et liens) de img/ et img/humor/"""
+    names = []
+    for directory in NAME_DIRS:
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            path = os.path.join(directory, filename)
+            if not filename.startswith('.') and (os.path.islink(path) or os.path.isfile(path)):
+                names.append(path)
+    return names
+
+
+def referenced_images():
+    """Ensemble des chemins img/... utilisés par au moins un fichier HTML de posts/"""
+    referenced = set()
+    for root, _, files in os.walk(POSTS_DIR):
+        for filename in files:
+            if filename.endswith('.html'):
+                with open(os.path.join(root, filename), 'r', encoding='utf-8') as f:
+                    referenced.update(IMAGE_REFERENCE_PATTERN.findall(f.read()))
+    return referenced
+
+
+def _blob_key(path):
+    """Identifiant du fichier réel derrière un nom (suit les liens symboliques)"""
+    stat = os.stat(path)
+    return (stat.st_dev, stat.st_ino)
+
+
+def collect_garbage(dry_run=False):
+    """Supprime les noms non référencés pointant vers le store, puis les blobs devenus orphelins"""
+    blobs = _list_blobs()
+    blob_keys = {_blob_key(blob): blob for blob in blobs}
+    referenced = referenced_images()
+
+    removed_names = 0
+    live_keys = set()
+    for name in _list_names():
+        try:
+            key = _blob_key(name)
+        except FileNotFoundError:
+            continue  # lien symbolique cassé
+        if key not in blob_keys:
+            continue  # image hors store (jamais supprimée automatiquement)
+        if name in referenced:
+            live_keys.add(key)
+        else:
+            print(f"🗑  Nom non référencé : {name}")
+            removed_names += 1
+            if not dry_run:
+                os.remove(name)
+
+    removed_blobs = 0
+    freed_bytes = 0
+    for key, blob in blob_keys.items():
+        if key not in live_keys:
+            removed_blobs += 1
+            freed_bytes += os.path.getsize(blob)
+            if not dry_run:
+                os.remove(blob)
+                blob_dir = os.path.dirname(blob)
+                if not os.listdir(blob_dir):
+                    os.rmdir(blob_dir)
+
+    prefix = "🧪 (simulation) " if dry_run else ""
+    print(f"\n{prefix}✓ {removed_names} nom(s) et {removed_blobs} blob(s) supprimés, "
+          f"{freed_bytes / 1024:.0f} Ko libérés ({len(blobs) - removed_blobs} blob(s) conservés)")
+
+
+def migrate(dry_run=False):
+    """Déplace les images classiques de img/ et img/humor/ dans le store (dédupliquées)"""
+    blob_keys = {_blob_key(blob) for blob in _list_blobs()}
+    migrated = 0
+    deduplicated = 0
+    for name in _list_names():
+        if os.path.islink(name) or _blob_key(name) in blob_keys:
+            continue
+        with open(name, 'rb') as f:
+            data = f.read()
+        migrated += 1
+        if dry_run:
+            deduplicated += os.path.exists(blob_path_for(data, os.path.splitext(name)[1].lower()))
+            continue
+        deduplicated += store_image(data, name)
+
+    prefix = "🧪 (simulation) " if dry_run else ""
+    print(f"{prefix}✓ {migrated} image(s) migrée(s) dans {STORE_DIR}/ ({deduplicated} doublon(s) fusionné(s))")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Stockage dédupliqué des images des posts (img/store/)'
+    )
+    parser.add_argument('command', choices=['gc', 'migrate'],
+                        help='gc : supprime les images inutilisées ; migrate : importe les images existantes')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Affiche ce qui serait fait sans rien modifier')
+
+    args = parser.parse_args()
+
+    if not os.path.isdir('img'):
+        print("❌ Erreur : Dossier img/ introuvable (lance la commande depuis la racine du projet)")
+        sys.exit(1)
+
+    if args.command == 'gc':
+        collect_garbage(dry_run=args.dry_run)
+    else:
+        migrate(dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Envoi unique d'une image aux modèles pendant une session.
+
+L'image est téléversée une seule fois, en arrière-plan, dans l'API Files d'OpenAI (expiration
+automatique après UPLOAD_EXPIRES_AFTER secondes). Dès que l'envoi est terminé, les requêtes
+suivantes la référencent par son identifiant : quelques centaines d'octets au lieu de l'image
+en base64. chat.completions n'accepte les fichiers téléversés qu'en PDF : une requête avec une
+partie input_image + file_id passe par l'API Responses (llm._responses_completion). Tant que l'envoi n'est pas fini, et pour les serveurs locaux (sans API Files) ou
+les cassettes (requêtes identiques d'une exécution à l'autre), l'image part en data URL,
+encodée une seule fois (image_pipeline.image_to_data_url).
+
+Si l'envoi échoue ou si le modèle refuse la référence, l'image repart en data URL.
+"""
+
+import os
+import threading
+from concurrent.futures import Future
+from image_pipeline import MIME_TYPES, image_to_data_url
+
+UPLOAD_PURPOSE = 'vision'
+# Le fichier n'est utile que le temps de la session (minimum accepté par l'API : 1 h)
+UPLOAD_EXPIRES_AFTER = 24 * 3600
+UPLOAD_TIMEOUT = 60
+
+
+def _upload(source):
+    """Téléverse l'image dans l'API Files, retourne son identifiant"""
+    from core import get_openai_client
+
+    mime_type = MIME_TYPES.get(source['format'], 'image/png')
+    uploaded = get_openai_client().files.create(
+        file=(os.path.basename(source['path']), source['raw'], mime_type),
+        purpose=UPLOAD_PURPOSE,
+        expires_after={'anchor': 'created_at', 'seconds': UPLOAD_EXPIRES_AFTER},
+        timeout=UPLOAD_TIMEOUT,
+    )
+    return uploaded.id
+
+
+def start_upload(source):
+    """Lance le téléversement de l'image en arrière-plan (une seule fois par image)"""
+    import cassettes
+
+    if source['upload'] is not None or cassettes.get_mode() is not None:
+        return
+    future = Future()
+    source['upload'] = future
+
+    def run():
+        try:
+            future.set_result(_upload(source))
+        except BaseException as e:
+            # Clé absente (sys.exit), réseau... : l'image partira en data URL
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def _uploaded_id(source, stage):
+    """Identifiant du fichier téléversé, ou None si l'image doit partir en data URL"""
+    from llm import backend_for
+
+    future = source['upload']
+    if not future or not future.done() or backend_for(stage) != 'openai':
+        return None
+    if future.exception() is not None:
+        print(f"⚠️  Attention : Envoi de l'image dans l'API Files impossible ({future.exception()}), envoi en base64")
+        source['upload'] = False
+        return None
+    return future.result()
+
+
+def inline_part(source):
+    """Image en data URL dans la requête"""
+    return {"type": "image_url", "image_url": {"url": image_to_data_url(source)}}
+
+
+def with_image(source, stage, request):
+    """Exécute request(partie image) avec l'image référencée par identifiant si possible, sinon en data URL"""
+    file_id = _uploaded_id(source, stage)
+    if file_id is None:
+        return request(inline_part(source))
+
+    import openai
+    try:
+        return request({"type": "input_image", "file_id": file_id, "detail": "auto"})
+    except openai.BadRequestError as e:
+        # Référence refusée (fichier expiré, modèle sans entrée image) : on n'essaie plus pour cette image
+        print(f"⚠️  Attention : Image {file_id} refusée par référence ({e.message}), "
+              f"envoi en base64 pour le reste de la session")
+        source['upload'] = False
+        return request(inline_part(source))
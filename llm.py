@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+Point d'accès unique aux modèles de langage : chaque appel chat.completions passe par
+chat_completion(étape, ...), qui choisit le backend de l'étape.
+
+Backends :
+    openai   API OpenAI (modèle défini par étape dans STAGES)
+    local    serveur local compatible OpenAI (llama.cpp server, Ollama, vLLM...)
+
+Configuration (.env) :
+    LLM_LOCAL_STAGES=translate_literal,translate_natural   # étapes envoyées au serveur local ('all' = toutes les étapes texte)
+    LLM_LOCAL_URL=http://localhost:8080/v1                  # URL du serveur local
+    LLM_LOCAL_MODEL=local                                   # nom du modèle côté serveur
+    LLM_EMBEDDING_URL=http://localhost:8081/v1              # serveur des embeddings (défaut : LLM_LOCAL_URL)
+    LLM_EMBEDDING_MODEL=local                               # modèle d'embedding côté serveur (CPU)
+
+Si le serveur local ne répond pas, l'étape repasse sur OpenAI (avec un avertissement).
+Les embeddings (embed, cache sémantique des explications) viennent toujours du serveur local :
+s'il ne répond pas, embed retourne None et l'appelant s'en passe.
+Chaque appel a un délai par étape (STAGES), réduit au temps restant du budget du post (deadline.py).
+
+Chaque appel est journalisé dans call_log avec le prompt versionné utilisé (prompts.py) et la
+part des tokens du prompt servie par le cache de préfixe d'OpenAI (cached_ratio).
+Les appels peuvent être enregistrés puis rejoués hors ligne (cassettes.py, backend 'cassette').
+
+Requêtes doublées (LLM_HEDGE=1) : pour les étapes marquées hedge appelées avec temperature=0,
+si la réponse n'est pas arrivée au bout du p90 des durées observées (llm_latency.json), une
+seconde requête identique part et la première réponse arrivée est gardée. La part de requêtes
+doublées est plafonnée (LLM_HEDGE_MAX_RATIO, 10 % par défaut) ; python llm.py stats affiche
+les durées par étape et le taux de victoire des requêtes doublées. Sans LLM_HEDGE=1, aucune durée
+n'est enregistrée ; le fichier est écrit toutes les LATENCY_SAVE_EVERY modifications et à la sortie.
+
+Variantes (chat_candidates) : plusieurs réponses en une seule requête (paramètre n), complétées
+par des requêtes parallèles si le backend n'en renvoie qu'une ; utilisé par « régénérer ».
+
+Cascades (chat_cascade) : un modèle moins cher répond d'abord, sa réponse est validée en Python
+et seules les réponses invalides repartent vers le modèle suivant ; le taux d'escalade est
+enregistré dans llm_latency.json et affiché par python llm.py stats.
+"""
+
+import atexit
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+import cassettes
+from core import getenv, get_openai_client
+from deadline import call_timeout, call_retries
+
+DEFAULT_LOCAL_URL = 'http://localhost:8080/v1'
+DEFAULT_LOCAL_MODEL = 'local'
+# Un modèle local sur CPU peut être lent (un serveur arrêté est détecté immédiatement : connexion refusée)
+LOCAL_TIMEOUT = 120
+# Embeddings de quelques mots : rapides même sur CPU
+EMBEDDING_TIMEOUT = 10
+
+# Étapes des trois générateurs : modèle OpenAI, besoin de vision, délai d'un appel (secondes)
+# et requête doublée possible (hedge : étapes déterministes, temperature=0)
+STAGES = {
+    'subtitle_ocr': {'model': 'gpt-4o-mini', 'vision': True, 'timeout': 30, 'hedge': True},
+    'movie_title': {'model': 'gpt-4o-mini', 'vision': True, 'timeout': 30},
+    'scene_texts': {'model': 'gpt-4o-mini', 'vision': True, 'timeout': 45, 'hedge': True},
+    'translate_literal': {'model': 'gpt-4o-mini', 'vision': False, 'timeout': 20},
+    'translate_natural': {'model': 'gpt-4o-mini', 'vision': False, 'timeout': 20, 'hedge': True},
+    'hide_text_draft': {'model': 'gpt-4o-mini', 'vision': False, 'timeout': 20},
+    'hide_text': {'model': 'gpt-4o', 'vision': False, 'timeout': 30},
+    'vocab_explanation': {'model': 'gpt-4o-mini', 'vision': False, 'timeout': 45, 'hedge': True},
+    'grammar_rule': {'model': 'gpt-4o', 'vision': False, 'timeout': 60},
+    'grammar_explanation': {'model': 'gpt-4o-mini', 'vision': False, 'timeout': 45},
+    'grammar_modify': {'model': 'gpt-4o-mini', 'vision': False, 'timeout': 45},
+    'humor_analysis': {'model': 'gpt-4o', 'vision': True, 'timeout': 90},
+    'humor_modify': {'model': 'gpt-4o', 'vision': False, 'timeout': 60},
+}
+# Nouvelles tentatives du SDK OpenAI (erreurs 429/5xx, délai dépassé), si le budget du post le permet
+OPENAI_MAX_RETRIES = 2
+
+# Variantes demandées d'un coup quand l'opérateur veut régénérer une réponse
+DEFAULT_CANDIDATES = 3
+
+# Durées observées par étape et backend (fenêtre glissante), compteurs des requêtes doublées
+LATENCY_PATH = 'llm_latency.json'
+LATENCY_WINDOW = 100
+HEDGE_MIN_SAMPLES = 10
+HEDGE_PERCENTILE = 0.9
+DEFAULT_HEDGE_MAX_RATIO = 0.1
+# Statistiques écrites sur disque toutes les N modifications (et à la sortie), pas à chaque appel
+LATENCY_SAVE_EVERY = 20
+
+# Journal des appels du processus (étape, prompt, backend, durée, tokens) : utilisé par les benchmarks
+call_log = []
+
+_local_client = None
+_local_unavailable = False
+_embedding_client = None
+_embedding_unavailable = False
+_latency = None
+_latency_changes = 0
+_latency_lock = threading.Lock()
+# Rôle de la requête en cours dans un doublement ('primary' ou 'hedge'), pour le journal
+_hedge_role = contextvars.ContextVar('hedge_role', default=None)
+
+
+def local_stages():
+    """Étapes configurées pour le serveur local"""
+    value = getenv('LLM_LOCAL_STAGES') or ''
+    stages = {stage.strip() for stage in value.split(',') if stage.strip()}
+    if 'all' in stages:
+        # Les étapes avec image ne partent en local que si elles sont nommées (modèle multimodal requis)
+        stages |= {stage for stage, config in STAGES.items() if not config['vision']}
+    return stages
+
+
+def backend_for(stage):
+    """Backend utilisé pour une étape ('local' ou 'openai')"""
+    return 'local' if stage in local_stages() and not _local_unavailable else 'openai'
+
+
+def get_local_client():
+    """Client du serveur local compatible OpenAI (créé au premier appel)"""
+    global _local_client
+    if _local_client is None:
+        from openai import OpenAI
+        _local_client = OpenAI(
+            base_url=getenv('LLM_LOCAL_URL') or DEFAULT_LOCAL_URL,
+            api_key=getenv('LLM_LOCAL_API_KEY') or 'local',
+            timeout=LOCAL_TIMEOUT,
+            max_retries=0,
+        )
+    return _local_client
+
+
+def get_embedding_client():
+    """Client du serveur d'embeddings local (créé au premier appel)"""
+    global _embedding_client
+    if _embedding_client is None:
+        from openai import OpenAI
+        _embedding_client = OpenAI(
+            base_url=getenv('LLM_EMBEDDING_URL') or getenv('LLM_LOCAL_URL') or DEFAULT_LOCAL_URL,
+            api_key=getenv('LLM_LOCAL_API_KEY') or 'local',
+            timeout=EMBEDDING_TIMEOUT,
+            max_retries=0,
+        )
+    return _embedding_client
+
+
+def embedding_model():
+    """Nom du modèle d'embedding (les vecteurs de modèles différents ne sont pas comparables)"""
+    return getenv('LLM_EMBEDDING_MODEL') or DEFAULT_LOCAL_MODEL
+
+
+def embed(texts):
+    """Vecteurs des textes via le modèle d'embedding local, ou None si le serveur est indisponible"""
+    global _embedding_unavailable
+    if _embedding_unavailable:
+        return None
+    import openai
+    request = {'model': embedding_model(), 'input': list(texts)}
+
+    def live_call():
+        response = get_embedding_client().embeddings.create(timeout=call_timeout(EMBEDDING_TIMEOUT), **request)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    try:
+        return cassettes.call('embedding', request, live_call)
+    except TimeoutError:
+        raise
+    except (openai.APIConnectionError, openai.APIStatusError) as e:
+        # Serveur arrêté ou sans modèle d'embedding : on n'essaie plus pour le reste du processus
+        _embedding_unavailable = True
+        print(f"⚠️  Attention : Serveur d'embeddings indisponible ({e})")
+        return None
+
+
+def _record(stage, prompt, backend, start, response):
+    """Ajoute l'appel au journal"""
+    usage = getattr(response, 'usage', None)
+    prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+    # Tokens du préfixe servis par le cache d'OpenAI (absent chez la plupart des serveurs locaux)
+    cached_tokens = getattr(getattr(usage, 'prompt_tokens_details', None), 'cached_tokens', 0) or 0
+    call_log.append({
+        'stage': stage,
+        'prompt': prompt,
+        'backend': backend,
+        'ms': (time.perf_counter() - start) * 1000,
+        'prompt_tokens': prompt_tokens,
+        'cached_tokens': cached_tokens,
+        'cached_ratio': cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+        'completion_tokens': getattr(usage, 'completion_tokens', 0) or 0,
+        'hedge': _hedge_role.get(),
+    })
+    # Durées utiles seulement aux requêtes doublées : rien n'est enregistré sans LLM_HEDGE=1
+    if backend != 'cassette' and getenv('LLM_HEDGE') == '1':
+        _observe(f"{stage}:{backend}", call_log[-1]['ms'])
+
+
+def _load_latency():
+    """Statistiques de durée (lues au premier appel, écrites à la sortie du processus)"""
+    global _latency
+    if _latency is None:
+        try:
+            with open(LATENCY_PATH, 'r', encoding='utf-8') as f:
+                _latency = json.load(f)
+        except (OSError, ValueError):
+            _latency = {}
+        atexit.register(flush_latency)
+    return _latency
+
+
+def _latency_stats(key):
+    """Statistiques d'une étape sur un backend (à appeler sous _latency_lock)"""
+    return _load_latency().setdefault(key, {'ms': [], 'calls': 0, 'hedges': 0, 'hedge_wins': 0})
+
+
+def _save_latency():
+    """Note une modification des statistiques, écrites toutes les LATENCY_SAVE_EVERY modifications
+    (et à la sortie) plutôt qu'à chaque appel (à appeler sous _latency_lock)"""
+    global _latency_changes
+    _latency_changes += 1
+    if _latency_changes >= LATENCY_SAVE_EVERY:
+        _write_latency()
+
+
+def _write_latency():
+    """Écrit les statistiques de façon atomique (à appeler sous _latency_lock)"""
+    global _latency_changes
+    # Fichier temporaire propre au processus : deux générateurs lancés en même temps ne se mélangent pas
+    tmp_path = f"{LATENCY_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(_latency, f)
+    os.replace(tmp_path, LATENCY_PATH)
+    _latency_changes = 0
+
+
+def flush_latency():
+    """Écrit les statistiques modifiées depuis la dernière écriture (appelé à la sortie du processus)"""
+    with _latency_lock:
+        if _latency is not None and _latency_changes:
+            _write_latency()
+
+
+def _observe(key, ms):
+    """Ajoute la durée d'une requête terminée à la fenêtre de son étape"""
+    with _latency_lock:
+        stats = _latency_stats(key)
+        stats['ms'] = (stats['ms'] + [round(ms)])[-LATENCY_WINDOW:]
+        _save_latency()
+
+
+def _count_cascade(name, escalated):
+    """Compte un passage dans une cascade (et une escalade si le premier modèle a échoué)"""
+    with _latency_lock:
+        stats = _load_latency().setdefault(f"cascade:{name}", {'calls': 0, 'escalations': 0})
+        stats['calls'] += 1
+        stats['escalations'] += escalated
+        _save_latency()
+
+
+def _percentile(samples, fraction):
+    """Percentile d'une liste de durées"""
+    ordered = sorted(samples)
+    return ordered[int(fraction * (len(ordered) - 1))]
+
+
+def _dump_response(response):
+    """Réponse chat.completions en JSON (cassettes)"""
+    return response.model_dump(mode='json')
+
+
+def _load_response(data):
+    """Réponse chat.completions reconstruite depuis une cassette"""
+    from openai.types.chat import ChatCompletion
+    return ChatCompletion.model_validate(data)
+
+
+def hedging_enabled(stage, params):
+    """Requête doublée possible : option activée, étape marquée hedge et appel déterministe"""
+    return getenv('LLM_HEDGE') == '1' and STAGES[stage].get('hedge') and params.get('temperature') == 0
+
+
+def chat_completion(stage, backend=None, prompt=None, **params):
+    """Appelle chat.completions.create pour une étape avec le backend configuré (prompt : id versionné pour le journal)"""
+    if hedging_enabled(stage, params):
+        live_call = lambda: _hedged_completion(stage, backend, prompt, params)  # noqa: E731
+    else:
+        live_call = lambda: _live_completion(stage, backend, prompt, params)  # noqa: E731
+
+    start = time.perf_counter()
+    response = cassettes.call(
+        'chat', {'stage': stage, **params}, live_call,
+        encode=_dump_response, decode=_load_response
+    )
+    if cassettes.get_mode() == 'replay':
+        _record(stage, prompt, 'cassette', start, response)
+    return response
+
+
+def chat_candidates(stage, n=DEFAULT_CANDIDATES, prompt=None, **params):
+    """Jusqu'à n réponses différentes d'une étape (textes sans doublons, dans l'ordre reçu)"""
+    response = chat_completion(stage, prompt=prompt, n=n, **params)
+    contents = [choice.message.content.strip() for choice in response.choices]
+
+    # Serveurs locaux sans paramètre n : les réponses manquantes sont demandées en parallèle
+    missing = n - len(contents)
+    if missing > 0:
+        with ThreadPoolExecutor(max_workers=missing) as executor:
+            # Chaque requête garde l'échéance du post (contextvars)
+            futures = [executor.submit(contextvars.copy_context().run, chat_completion, stage, prompt=prompt, **params)
+                       for _ in range(missing)]
+            contents += [future.result().choices[0].message.content.strip() for future in futures]
+    return list(dict.fromkeys(content for content in contents if content))
+
+
+def chat_cascade(stages, validate, prompt=None, **params):
+    """Essaie les étapes dans l'ordre (modèle le moins cher d'abord), garde la première réponse validée"""
+    for stage, next_stage in zip(stages, stages[1:]):
+        try:
+            response = chat_completion(stage, prompt=prompt, **params)
+        except TimeoutError:
+            # Budget du post épuisé : l'étape suivante échouerait aussi
+            raise
+        except Exception as e:
+            print(f"⚠️  Attention : Échec de {stage} ({e}), passage à {next_stage}")
+            continue
+        if validate(response.choices[0].message.content):
+            _count_cascade(stages[-1], escalated=False)
+            return response
+        print(f"⚠️  Attention : Réponse de {stage} invalide, passage à {next_stage}")
+
+    _count_cascade(stages[-1], escalated=True)
+    return chat_completion(stages[-1], prompt=prompt, **params)
+
+
+def _start(function, role):
+    """Lance une requête dans un thread daemon (une requête perdante n'empêche pas le script de finir)"""
+    future = Future()
+    # Le thread garde l'échéance du post (contextvars) et note son rôle pour le journal
+    context = contextvars.copy_context()
+
+    def run():
+        _hedge_role.set(role)
+        try:
+            future.set_result(function())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=context.run, args=(run,), daemon=True).start()
+    return future
+
+
+def _hedged_completion(stage, backend, prompt, params):
+    """Requête doublée si la première n'a pas répondu au bout du p90 observé, première réponse gardée"""
+    live_call = lambda: _live_completion(stage, backend, prompt, params)  # noqa: E731
+    key = f"{stage}:{backend or backend_for(stage)}"
+    with _latency_lock:
+        stats = _latency_stats(key)
+        stats['calls'] += 1
+        samples = list(stats['ms'])
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return live_call()
+
+    primary = _start(live_call, 'primary')
+    try:
+        return primary.result(timeout=_percentile(samples, HEDGE_PERCENTILE) / 1000)
+    except FutureTimeout:
+        pass
+
+    # Plafond de dépense : pas plus de LLM_HEDGE_MAX_RATIO requêtes doublées par appel
+    max_ratio = float(getenv('LLM_HEDGE_MAX_RATIO') or DEFAULT_HEDGE_MAX_RATIO)
+    with _latency_lock:
+        allowed = stats['hedges'] < max_ratio * stats['calls']
+        if allowed:
+            stats['hedges'] += 1
+    if not allowed:
+        return primary.result()
+
+    hedge = _start(live_call, 'hedge')
+    done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+    winner = primary if primary in done else hedge
+    if winner.exception() is not None:
+        # La première réponse est une erreur : on attend l'autre requête
+        winner = hedge if winner is primary else primary
+    response = winner.result()
+
+    with _latency_lock:
+        stats['hedge_wins'] += winner is hedge
+        _save_latency()
+    return response
+
+
+def _live_completion(stage, backend, prompt, params):
+    """Appel réel : serveur local pour les étapes configurées (repli sur OpenAI), sinon OpenAI"""
+    global _local_unavailable
+    config = STAGES[stage]
+    backend = backend or backend_for(stage)
+
+    if backend == 'local':
+        import openai
+        start = time.perf_counter()
+        try:
+            response = get_local_client().chat.completions.create(
+                model=getenv('LLM_LOCAL_MODEL') or DEFAULT_LOCAL_MODEL,
+                timeout=call_timeout(LOCAL_TIMEOUT), **params
+            )
+            _record(stage, prompt, 'local', start, response)
+            return response
+        except openai.APIConnectionError as e:
+            # Serveur arrêté : on n'essaie plus pour le reste du processus
+            _local_unavailable = True
+            print(f"⚠️  Attention : Serveur LLM local indisponible ({e}), repli sur OpenAI")
+
+    # Délai de l'étape borné par le budget du post (deadline.py)
+    timeout = call_timeout(config['timeout'])
+    client = get_openai_client().with_options(max_retries=call_retries(timeout, OPENAI_MAX_RETRIES))
+    start = time.perf_counter()
+    if _has_file_images(params['messages']):
+        response = _responses_completion(client, config['model'], timeout, params)
+    else:
+        response = client.chat.completions.create(model=config['model'], timeout=timeout, **params)
+    _record(stage, prompt, 'openai', start, response)
+    return response
+
+
+def _has_file_images(messages):
+    """Messages avec une image téléversée référencée par identifiant (partie input_image + file_id)"""
+    return any(isinstance(message['content'], list)
+               and any(part.get('type') == 'input_image' for part in message['content'])
+               for message in messages)
+
+
+def _responses_completion(client, model, timeout, params):
+    """Appel via l'API Responses, seule à accepter une image par file_id (chat.completions n'accepte
+    les fichiers qu'en PDF), réponse convertie au format chat.completions pour les appelants"""
+    from openai.types.chat import ChatCompletion
+
+    input_items = []
+    for message in params['messages']:
+        content = message['content']
+        if isinstance(content, list):
+            content = [{'type': 'input_text', 'text': part['text']} if part['type'] == 'text' else part
+                       for part in content]
+        input_items.append({'role': message['role'], 'content': content})
+    # Pas de paramètre n dans l'API Responses : une seule réponse (chat_candidates complète en parallèle)
+    options = {key: value for key, value in params.items() if key not in ('messages', 'n')}
+    response = client.responses.create(model=model, input=input_items, timeout=timeout, **options)
+
+    usage = response.usage
+    return ChatCompletion.model_validate({
+        'id': response.id,
+        'object': 'chat.completion',
+        'created': int(response.created_at),
+        'model': response.model,
+        'choices': [{'index': 0, 'finish_reason': 'stop',
+                     'message': {'role': 'assistant', 'content': response.output_text}}],
+        'usage': {
+            'prompt_tokens': usage.input_tokens,
+            'completion_tokens': usage.output_tokens,
+            'total_tokens': usage.total_tokens,
+            'prompt_tokens_details': {'cached_tokens': usage.input_tokens_details.cached_tokens},
+        } if usage else None,
+    })
+
+
+def print_stats():
+    """Affiche les durées observées par étape et le taux de victoire des requêtes doublées"""
+    latency = _load_latency()
+    if not latency:
+        print(f"⚠️  Aucune durée enregistrée ({LATENCY_PATH})")
+        return
+    cascades = {key: stats for key, stats in latency.items() if key.startswith('cascade:')}
+    print(f"{'étape:backend':<32} {'n':>4} {'p50 ms':>8} {'p90 ms':>8} {'doublées':>9} {'gagnées':>8}")
+    for key, stats in sorted(latency.items()):
+        if key in cascades:
+            continue
+        samples = stats['ms']
+        p50 = _percentile(samples, 0.5) if samples else 0
+        p90 = _percentile(samples, HEDGE_PERCENTILE) if samples else 0
+        hedged = f"{stats['hedges']}/{stats['calls']}" if stats['calls'] else '-'
+        wins = f"{stats['hedge_wins'] / stats['hedges']:.0%}" if stats['hedges'] else '-'
+        print(f"{key:<32} {len(samples):>4} {p50:>8} {p90:>8} {hedged:>9} {wins:>8}")
+
+    for key, stats in sorted(cascades.items()):
+        rate = stats['escalations'] / stats['calls'] if stats['calls'] else 0
+        print(f"\n{key}: {stats['escalations']}/{stats['calls']} escalade(s) vers le modèle final ({rate:.0%})")
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] != ['stats']:
+        print("Usage : python3 llm.py stats")
+        sys.exit(1)
+    print_stats()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Page d'index des posts générés : posts/index.html liste tous les posts de posts/,
+posts/grammar/ et posts/humor/ (type, date, titre, subreddits, état de publication)
+avec filtres par type, état et texte.
+
+Les métadonnées sont extraites du HTML de chaque post et mises en cache dans
+posts/.index-cache.json : à chaque build, seuls les posts dont la date de modification
+a changé sont relus. L'état de publication est lu par la page dans le localStorage du
+tracker de chaque post (clé storageKey).
+
+Usage:
+    python posts_index.py           # mise à jour incrémentale
+    python posts_index.py --full    # relit tous les posts
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from html import unescape
+from static_assets import config_json
+from template_engine import render_template
+
+POSTS_DIR = 'posts'
+INDEX_PATH = os.path.join(POSTS_DIR, 'index.html')
+CACHE_PATH = os.path.join(POSTS_DIR, '.index-cache.json')
+CACHE_VERSION = 2
+
+# Dossier -> type de post
+POST_TYPES = {'': 'vocab', 'grammar': 'grammar', 'humor': 'humor'}
+
+TITLE_PATTERN = re.compile(r'<title>(.*?)</title>', re.DOTALL)
+CONFIG_PATTERN = re.compile(r'<script type="application/json" id="post-config">(.*?)</script>', re.DOTALL)
+# Anciens posts (script inline, avant le bundle partagé) : seule la liste des subreddits est lisible
+LEGACY_SUBREDDITS_PATTERN = re.compile(r'const SUBREDDITS = (\[.*?\]);')
+# ... et la clé du tracker, construite dans le script : `reddit-post-${EXPRESSION}-${DATE}`
+LEGACY_KEY_PATTERN = re.compile(r'const (?:EXPRESSION|RULE|TITLE_SLUG) = "(.*?)";\s*const DATE = "(.*?)";', re.DOTALL)
+STORAGE_KEY_PREFIXES = {'vocab': 'reddit-post-', 'grammar': 'reddit-post-grammar-', 'humor': 'reddit-post-humor-'}
+FILENAME_PATTERN = re.compile(r'^(.*)-(\d{4}-\d{2}-\d{2})\.html$')
+
+
+def parse_post(path, post_type):
+    """Extrait les métadonnées d'un post HTML"""
+    with open(path, 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    filename = os.path.basename(path)
+    match = FILENAME_PATTERN.match(filename)
+    slug, date_str = (match.group(1), match.group(2)) if match else (filename[:-len('.html')], '')
+
+    title = TITLE_PATTERN.search(html)
+    storage_key = None
+    subreddits = []
+
+    config = CONFIG_PATTERN.search(html)
+    if config:
+        data = json.loads(config.group(1).replace('<\\/', '</'))
+        storage_key = data.get('storageKey')
+        subreddits = data.get('subreddits', [])
+    else:
+        legacy = LEGACY_SUBREDDITS_PATTERN.search(html)
+        if legacy:
+            subreddits = json.loads(legacy.group(1))
+
+    if not storage_key:
+        # Ancien post : clé reconstruite comme dans son script, sinon depuis le nom du fichier
+        # (l'expression d'un post vocab peut différer de son slug)
+        legacy_key = LEGACY_KEY_PATTERN.search(html)
+        key_slug, key_date = legacy_key.groups() if legacy_key else (slug, date_str)
+        storage_key = f"{STORAGE_KEY_PREFIXES[post_type]}{key_slug}-{key_date}"
+
+    return {
+        'path': os.path.relpath(path, POSTS_DIR).replace(os.sep, '/'),
+        'type': post_type,
+        'slug': slug,
+        'date': date_str,
+        'title': unescape(title.group(1).strip()) if title else slug,
+        'subreddits': subreddits,
+        'storageKey': storage_key,
+    }
+
+
+def _load_cache():
+    """Lit le cache des métadonnées (vide s'il est absent ou d'une autre version)"""
+    try:
+        with open(CACHE_PATH, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache.get('posts', {}) if cache.get('version') == CACHE_VERSION else {}
+
+
+def _save_cache(entries):
+    """Écrit le cache de façon atomique"""
+    tmp_path = CACHE_PATH + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': CACHE_VERSION, 'posts': entries}, f, ensure_ascii=False)
+    os.replace(tmp_path, CACHE_PATH)
+
+
+def _scan_posts():
+    """Liste les posts HTML : chemin -> (type, mtime_ns, taille)"""
+    found = {}
+    for subdir, post_type in POST_TYPES.items():
+        directory = os.path.join(POSTS_DIR, subdir)
+        if not os.path.isdir(directory):
+            continue
+        with os.scandir(directory) as it:
+            for entry in it:
+                if not entry.is_file() or not entry.name.endswith('.html') or entry.path == INDEX_PATH:
+                    continue
+                stat = entry.stat()
+                found[entry.path] = (post_type, stat.st_mtime_ns, stat.st_size)
+    return found
+
+
+def build_index(full=False, verbose=True):
+    """Met à jour posts/index.html en ne relisant que les posts modifiés depuis le dernier build"""
+    start = time.perf_counter()
+    cached = {} if full else _load_cache()
+    entries = {}
+    parsed = 0
+
+    for path, (post_type, mtime_ns, size) in _scan_posts().items():
+        entry = cached.get(path)
+        if entry is None or entry['mtime_ns'] != mtime_ns or entry['size'] != size:
+            entry = {'mtime_ns': mtime_ns, 'size': size, 'meta': parse_post(path, post_type)}
+            parsed += 1
+        entries[path] = entry
+
+    removed = len(cached.keys() - entries.keys())
+    changed = parsed or removed or len(cached) != len(entries)
+    if not changed and os.path.exists(INDEX_PATH):
+        if verbose:
+            print(f"✓ Index à jour ({len(entries)} posts, {(time.perf_counter() - start) * 1000:.1f} ms)")
+        return INDEX_PATH
+
+    posts = sorted((entry['meta'] for entry in entries.values()),
+                   key=lambda meta: (meta['date'], meta['path']), reverse=True)
+    html_content = render_template('index.html', post_count=len(posts), posts_json=config_json(posts))
+
+    os.makedirs(POSTS_DIR, exist_ok=True)
+    with open(INDEX_PATH, 'w', encoding='utf-8') as f:
+        f.write(html_content)
+    _save_cache(entries)
+
+    if verbose:
+        print(f"✓ Index généré : {INDEX_PATH} ({len(posts)} posts, {parsed} relu(s), {removed} supprimé(s), "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms)")
+    return INDEX_PATH
+
+
+def load_posts():
+    """Métadonnées de tous les posts (index mis à jour au passage)"""
+    build_index(verbose=False)
+    return [entry['meta'] for entry in _load_cache().values()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Génère la page d\'index des posts (posts/index.html)')
+    parser.add_argument('--full', action='store_true',
+                        help='Ignore le cache et relit tous les posts')
+    args = parser.parse_args()
+    build_index(full=args.full)
+
+
+if __name__ == '__main__':
+    main()
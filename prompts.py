@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Prompts versionnés des étapes LLM (dossier prompts/, un fichier <nom>.v<version>.txt).
+
+Chaque fichier a deux parties :
+    --- system ---   instructions et exemples, identiques octet pour octet d'un appel à l'autre
+    --- user ---     partie variable, avec des emplacements {nom} remplis à chaque appel
+
+Le préfixe fixe est envoyé en premier (message system), la partie variable à la fin : OpenAI
+met en cache les préfixes déjà vus (à partir de 1024 tokens) et les serveurs locaux
+(llama.cpp...) réutilisent le KV cache du préfixe. Modifier un prompt = créer une nouvelle
+version et changer PROMPT_VERSIONS, pour que le journal des appels reste comparable.
+"""
+
+import os
+from functools import lru_cache
+
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prompts')
+
+SYSTEM_MARKER = '--- system ---'
+USER_MARKER = '--- user ---'
+
+# Version utilisée pour chaque prompt
+PROMPT_VERSIONS = {
+    'translate_literal': 1,
+    'hide_text': 1,
+    'vocab_explanation_expression': 1,
+    'vocab_explanation_word': 1,
+    'grammar_explanation': 1,
+    'scene_texts': 1,
+}
+
+
+def prompt_id(name):
+    """Identifiant versionné d'un prompt (ex: hide_text.v1), enregistré dans le journal des appels"""
+    return f"{name}.v{PROMPT_VERSIONS[name]}"
+
+
+@lru_cache(maxsize=None)
+def load_prompt(name):
+    """Lit un prompt versionné une seule fois, retourne (préfixe system, template user)"""
+    path = os.path.join(PROMPTS_DIR, f"{prompt_id(name)}.txt")
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+
+    if not source.startswith(SYSTEM_MARKER) or USER_MARKER not in source:
+        raise ValueError(f"Prompt invalide (sections {SYSTEM_MARKER} / {USER_MARKER} attendues) : {path}")
+
+    system, user = source[len(SYSTEM_MARKER):].split(USER_MARKER, 1)
+    return system.strip('\n'), user.strip('\n')
+
+
+def prompt_messages(name, **values):
+    """Messages d'un appel : préfixe fixe en system, partie variable remplie en user"""
+    system, user = load_prompt(name)
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user.format(**values)},
+    ]
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Serveur local de l'état de publication des posts (bibliothèque standard uniquement).
+
+Il sert posts/ et img/ en HTTP et stocke l'état du tracker de chaque post (subreddits
+publiés, subreddit sélectionné, textes édités) dans une base SQLite (publication.db)
+au lieu du localStorage du navigateur. Les pages envoient leurs modifications par lots
+à l'API JSON ; les états déjà présents dans le localStorage sont importés au premier
+chargement de chaque page.
+
+API :
+    GET  /api/state[?key=...&key=...]        état des posts (tous, ou ceux demandés)
+    POST /api/state  {"states": {clé: état}}  enregistre un lot d'états (une transaction)
+    GET  /api/posts?subreddit=r/learnfrench&published=0[&type=grammar]
+                                              requête groupée sur les posts
+
+Usage:
+    python publication_server.py serve [--port 8000]     # puis ouvrir http://localhost:8000/
+    python publication_server.py unpublished r/learnfrench
+"""
+
+import argparse
+import json
+import os
+import posixpath
+import sqlite3
+import sys
+import threading
+import time
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+from posts_index import load_posts
+
+DB_PATH = 'publication.db'
+DEFAULT_PORT = 8000
+# Seuls ces dossiers sont servis (pas de .env ni de scripts)
+SERVED_PREFIXES = ('/posts/', '/img/')
+MAX_BODY_BYTES = 5 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    key TEXT PRIMARY KEY,
+    path TEXT,
+    type TEXT,
+    title TEXT,
+    date TEXT,
+    selected_index INTEGER NOT NULL DEFAULT 0,
+    edited_content TEXT NOT NULL DEFAULT '{}',
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS publications (
+    key TEXT NOT NULL REFERENCES posts(key),
+    position INTEGER NOT NULL,
+    subreddit TEXT NOT NULL,
+    published INTEGER NOT NULL DEFAULT 0,
+    published_at REAL,
+    PRIMARY KEY (key, position)
+);
+CREATE INDEX IF NOT EXISTS publications_by_subreddit ON publications (subreddit, published);
+"""
+
+# Connexion SQLite partagée par les threads du serveur (accès sérialisés par le verrou)
+_db = None
+_db_lock = threading.Lock()
+
+
+def get_db():
+    """Connexion SQLite (ouverte et schéma créé au premier appel)"""
+    global _db
+    if _db is None:
+        _db = sqlite3.connect(DB_PATH, timeout=10, check_same_thread=False)
+        _db.execute('PRAGMA journal_mode=WAL')
+        _db.execute('PRAGMA synchronous=NORMAL')
+        _db.executescript(SCHEMA)
+    return _db
+
+
+def register_posts(db):
+    """Déclare les posts de posts/ (avec leurs subreddits non publiés) s'ils sont absents de la base"""
+    posts = [meta for meta in load_posts() if meta['storageKey']]
+    with db:
+        db.executemany(
+            "INSERT INTO posts (key, path, type, title, date) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET path = excluded.path, type = excluded.type, "
+            "title = excluded.title, date = excluded.date",
+            [(meta['storageKey'], meta['path'], meta['type'], meta['title'], meta['date']) for meta in posts]
+        )
+        db.executemany(
+            "INSERT OR IGNORE INTO publications (key, position, subreddit) VALUES (?, ?, ?)",
+            [(meta['storageKey'], position, subreddit)
+             for meta in posts for position, subreddit in enumerate(meta['subreddits'])]
+        )
+    return len(posts)
+
+
+def load_states(db, keys=None):
+    """États au format du tracker : {clé: {published, selectedSubredditIndex, editedContent}}"""
+    states = {}
+    query = "SELECT key, selected_index, edited_content FROM posts"
+    params = ()
+    if keys:
+        query += f" WHERE key IN ({', '.join('?' * len(keys))})"
+        params = tuple(keys)
+    for key, selected_index, edited_content in db.execute(query, params):
+        states[key] = {'published': [], 'selectedSubredditIndex': selected_index,
+                       'editedContent': json.loads(edited_content)}
+
+    query = "SELECT key, published FROM publications"
+    if keys:
+        query += f" WHERE key IN ({', '.join('?' * len(keys))})"
+    for key, published in db.execute(query + " ORDER BY key, position", params):
+        states[key]['published'].append(bool(published))
+    return states
+
+
+def save_states(db, states):
+    """Enregistre un lot d'états envoyé par les pages (une seule transaction)"""
+    now = time.time()
+    with db:
+        for key, state in states.items():
+            db.execute(
+                "INSERT INTO posts (key, path, selected_index, edited_content, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET selected_index = excluded.selected_index, "
+                "edited_content = excluded.edited_content, updated_at = excluded.updated_at, "
+                "path = COALESCE(posts.path, excluded.path)",
+                (key, state.get('path'), int(state.get('selectedSubredditIndex', 0)),
+                 json.dumps(state.get('editedContent') or {}, ensure_ascii=False), now)
+            )
+            subreddits = state.get('subreddits') or []
+            for position, published in enumerate(state.get('published', [])):
+                subreddit = subreddits[position] if position < len(subreddits) else ''
+                db.execute(
+                    "INSERT INTO publications (key, position, subreddit, published, published_at) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(key, position) DO UPDATE SET published = excluded.published, "
+                    "subreddit = CASE WHEN excluded.subreddit != '' THEN excluded.subreddit ELSE subreddit END, "
+                    "published_at = CASE WHEN excluded.published AND NOT published THEN excluded.published_at "
+                    "WHEN excluded.published THEN published_at END",
+                    (key, position, subreddit, int(bool(published)), now if published else None)
+                )
+    return len(states)
+
+
+def query_posts(db, subreddit=None, published=None, post_type=None):
+    """Posts filtrés par subreddit / état / type (ex: non publiés dans r/learnfrench)"""
+    query = ("SELECT p.key, p.path, p.type, p.title, p.date, s.subreddit, s.published, s.published_at "
+             "FROM publications s JOIN posts p ON p.key = s.key WHERE 1 = 1")
+    params = []
+    if subreddit:
+        query += " AND s.subreddit = ?"
+        params.append(subreddit)
+    if published is not None:
+        query += " AND s.published = ?"
+        params.append(int(published))
+    if post_type:
+        query += " AND p.type = ?"
+        params.append(post_type)
+    query += " ORDER BY p.date DESC, p.key, s.position"
+
+    columns = ('key', 'path', 'type', 'title', 'date', 'subreddit', 'published', 'publishedAt')
+    rows = [dict(zip(columns, row)) for row in db.execute(query, params)]
+    for row in rows:
+        row['published'] = bool(row['published'])
+    return rows
+
+
+def _is_served(path):
+    """Vrai si le chemin (normalisé, pour refuser les ../) est dans posts/ ou img/"""
+    return (posixpath.normpath(unquote(path)) + '/').startswith(SERVED_PREFIXES)
+
+
+class PublicationHandler(SimpleHTTPRequestHandler):
+    """Fichiers de posts/ et img/ + API JSON de l'état de publication"""
+
+    def log_request(self, code='-', size='-'):
+        # Seules les erreurs sont affichées (les pages font beaucoup de requêtes)
+        if str(getattr(code, 'value', code)).startswith(('4', '5')):
+            super().log_request(code, size)
+
+    def _send_json(self, data, status=HTTPStatus.OK):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+
+        if url.path == '/':
+            self.send_response(HTTPStatus.FOUND)
+            self.send_header('Location', '/posts/index.html')
+            self.end_headers()
+        elif url.path == '/api/state':
+            with _db_lock:
+                states = load_states(get_db(), params.get('key'))
+            self._send_json(states)
+        elif url.path == '/api/posts':
+            published = params.get('published', [None])[0]
+            with _db_lock:
+                db = get_db()
+                # Les posts générés depuis le démarrage du serveur sont pris en compte
+                register_posts(db)
+                rows = query_posts(
+                    db,
+                    subreddit=params.get('subreddit', [None])[0],
+                    published=None if published is None else published in ('1', 'true'),
+                    post_type=params.get('type', [None])[0],
+                )
+            self._send_json(rows)
+        elif _is_served(url.path):
+            super().do_GET()
+        else:
+            self.send_error(HTTPStatus.NOT_FOUND)
+
+    def do_HEAD(self):
+        if _is_served(urlsplit(self.path).path):
+            super().do_HEAD()
+        else:
+            self.send_error(HTTPStatus.NOT_FOUND)
+
+    def do_POST(self):
+        if urlsplit(self.path).path != '/api/state':
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            self.send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            return
+        try:
+            states = json.loads(self.rfile.read(length))['states']
+            with _db_lock:
+                saved = save_states(get_db(), states)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self._send_json({'error': str(e)}, HTTPStatus.BAD_REQUEST)
+            return
+        self._send_json({'saved': saved})
+
+
+def serve(port):
+    """Lance le serveur sur localhost"""
+    count = register_posts(get_db())
+    print(f"✓ {count} posts enregistrés dans {DB_PATH}")
+    server = ThreadingHTTPServer(('127.0.0.1', port), PublicationHandler)
+    print(f"✓ Serveur lancé : http://localhost:{port}/ (Ctrl+C pour arrêter)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Serveur arrêté")
+    finally:
+        server.server_close()
+
+
+def print_unpublished(subreddit):
+    """Affiche les posts pas encore publiés dans un subreddit"""
+    db = get_db()
+    register_posts(db)
+    rows = query_posts(db, subreddit=subreddit, published=False)
+    for row in rows:
+        print(f"{row['date']}  {row['type']:<8} posts/{row['path']}")
+    print(f"\n✓ {len(rows)} post(s) non publié(s) dans {subreddit}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Serveur local de l\'état de publication des posts (SQLite)'
+    )
+    parser.add_argument('command', choices=['serve', 'unpublished'],
+                        help='serve : lance le serveur ; unpublished : liste les posts non publiés dans un subreddit')
+    parser.add_argument('subreddit', nargs='?',
+                        help='Subreddit pour la commande unpublished (ex: r/learnfrench)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'Port du serveur (défaut : {DEFAULT_PORT})')
+
+    args = parser.parse_args()
+
+    if not os.path.isdir('posts'):
+        print("❌ Erreur : Dossier posts/ introuvable (lance la commande depuis la racine du projet)")
+        sys.exit(1)
+
+    if args.command == 'serve':
+        serve(args.port)
+    else:
+        if not args.subreddit:
+            print("❌ Erreur : Précise le subreddit (ex: python publication_server.py unpublished r/learnfrench)")
+            sys.exit(1)
+        print_unpublished(args.subreddit)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Cache sémantique des explications vocab (semantic_cache.json + semantic_cache.npy).
+
+Chaque explication générée est gardée avec le vecteur de son expression normalisée (modèle
+d'embedding local sur CPU, voir llm.embed). Avant d'appeler le modèle, generate.py cherche
+l'expression la plus proche (similarité cosinus, produit scalaire de vecteurs normalisés) :
+la même expression (après normalisation) est reprise directement ; au-dessus de
+SEMANTIC_CACHE_THRESHOLD (0.9 par défaut), l'expression proche et sa similarité sont affichées
+et l'opérateur confirme la reprise ("ce n'est pas gagné" propose "c'est pas gagné", mais
+"c'est gagné" aussi : le sens peut être opposé).
+
+Seules les explications du même type (expression ou mot) et de la même version de prompt sont
+reprises. Sans serveur d'embeddings, seule l'expression identique (après normalisation) est
+retrouvée. SEMANTIC_CACHE=0 (.env) désactive le cache ; generate.py --nouvelle-explication
+ignore le cache pour un post (la nouvelle explication remplace l'ancienne).
+
+Usage:
+    python semantic_cache.py stats
+    python semantic_cache.py lookup "ce n'est pas gagné" [--mot]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from core import getenv
+from deadline import paused
+from translation_memory import normalize
+
+CACHE_PATH = 'semantic_cache.json'
+VECTORS_PATH = 'semantic_cache.npy'
+CACHE_VERSION = 1
+DEFAULT_THRESHOLD = 0.9
+KINDS = ('expression', 'mot')
+
+_cache = None
+_vectors = None
+
+
+def is_enabled():
+    """Cache actif (désactivable avec SEMANTIC_CACHE=0)"""
+    return (getenv('SEMANTIC_CACHE') or '1') != '0'
+
+
+def threshold():
+    """Similarité minimale pour reprendre une explication"""
+    return float(getenv('SEMANTIC_CACHE_THRESHOLD') or DEFAULT_THRESHOLD)
+
+
+def _embed(texts):
+    """Vecteurs normalisés (float32, une ligne par texte) ou None sans serveur d'embeddings"""
+    import numpy as np
+    from llm import embed
+
+    vectors = embed(texts)
+    if vectors is None:
+        return None
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _load():
+    """Entrées et matrice des vecteurs (lues au premier appel)"""
+    global _cache, _vectors
+    if _cache is None:
+        import numpy as np
+        from llm import embedding_model
+
+        try:
+            with open(CACHE_PATH, 'r', encoding='utf-8') as f:
+                _cache = json.load(f)
+            _vectors = np.load(VECTORS_PATH)
+        except (OSError, ValueError):
+            _cache, _vectors = None, None
+        if _cache is None or _cache.get('version') != CACHE_VERSION or len(_vectors) != len(_cache['entries']):
+            _cache = {'version': CACHE_VERSION, 'model': embedding_model(), 'entries': []}
+            _vectors = np.zeros((0, 0), dtype=np.float32)
+
+        # Vecteurs d'un autre modèle, ou absents (serveur arrêté lors de l'ajout) : recalculés
+        missing = not np.linalg.norm(_vectors, axis=1).all()
+        if _cache['entries'] and (_cache['model'] != embedding_model() or missing):
+            vectors = _embed([entry['normalized'] for entry in _cache['entries']])
+            if vectors is not None:
+                _cache['model'], _vectors = embedding_model(), vectors
+                _save()
+    return _cache, _vectors
+
+
+def _save():
+    """Écrit les entrées et les vecteurs de façon atomique"""
+    import numpy as np
+
+    for path, write in ((VECTORS_PATH, lambda f: np.save(f, _vectors)),
+                        (CACHE_PATH, lambda f: f.write(json.dumps(_cache, ensure_ascii=False).encode('utf-8')))):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+
+def _search(normalized, kind, prompt, query=None):
+    """Entrée la plus proche du même type et du même prompt : (index, similarité) ou (None, 0)"""
+    import numpy as np
+
+    cache, vectors = _load()
+    candidates = [i for i, entry in enumerate(cache['entries']) if entry['kind'] == kind and entry['prompt'] == prompt]
+    for i in candidates:
+        if cache['entries'][i]['normalized'] == normalized:
+            return i, 1.0
+    if not candidates or query is None or vectors.shape[1] != len(query):
+        return None, 0
+
+    similarities = vectors[candidates] @ query
+    best = int(np.argmax(similarities))
+    return candidates[best], float(similarities[best])
+
+
+def lookup(text, kind, prompt):
+    """Explication enregistrée la plus proche : (entrée, similarité) ou (None, 0)"""
+    normalized = normalize(text)
+    query = _embed([normalized])
+    index, similarity = _search(normalized, kind, prompt, None if query is None else query[0])
+    if index is None:
+        return None, 0
+    return _load()[0]['entries'][index], similarity
+
+
+def store(text, kind, prompt, explanation, query=None):
+    """Ajoute une explication (query : vecteur déjà calculé de l'expression normalisée)"""
+    import numpy as np
+    global _vectors
+
+    cache, vectors = _load()
+    normalized = normalize(text)
+    if query is None:
+        embedded = _embed([normalized])
+        query = None if embedded is None else embedded[0]
+    if vectors.shape[1] == 0 and query is not None:
+        # Premier vecteur : les entrées précédentes (nulles) seront recalculées au prochain chargement
+        vectors = np.zeros((len(cache['entries']), len(query)), dtype=np.float32)
+    # Sans serveur d'embeddings : vecteur nul, recalculé au prochain chargement
+    row = query if query is not None else np.zeros(vectors.shape[1], dtype=np.float32)
+
+    entry = {
+        'text': text,
+        'normalized': normalized,
+        'kind': kind,
+        'prompt': prompt,
+        'explanation': explanation,
+        'created_at': time.time(),
+    }
+    # Même expression déjà en cache (explication régénérée) : l'entrée est remplacée
+    for i, existing in enumerate(cache['entries']):
+        if existing['normalized'] == normalized and existing['kind'] == kind and existing['prompt'] == prompt:
+            cache['entries'][i] = entry
+            vectors[i] = row
+            _vectors = vectors
+            _save()
+            return
+
+    cache['entries'].append(entry)
+    _vectors = np.vstack([vectors, row[np.newaxis, :]])
+    _save()
+
+
+def confirm_reuse(text, entry, similarity):
+    """Demande à l'opérateur s'il reprend l'explication d'une expression proche (mais différente)"""
+    print(f"\n💡 Explication en cache pour une expression proche : \"{entry['text']}\" "
+          f"(similarité {similarity:.0%}, demandé : \"{text}\")")
+    print(f"   {entry['explanation'].splitlines()[0][:200]}")
+    # Le temps de réponse de l'opérateur ne compte pas dans le budget du post (POST_BUDGET)
+    try:
+        with paused():
+            answer = input("Reprendre cette explication ? (oui/non) : ").strip().lower()
+    except EOFError:
+        answer = ''
+    return answer == 'oui'
+
+
+def explain_with_cache(text, kind, prompt, explain, fresh=False):
+    """Explication reprise du cache (expression identique, ou proche si l'opérateur confirme),
+    sinon explain() puis enregistrée (fresh : cache ignoré pour ce post)"""
+    if not is_enabled():
+        return explain()
+
+    normalized = normalize(text)
+    query = None
+    if not fresh:
+        # Expression identique : reprise directe, sans calculer son vecteur
+        index, similarity = _search(normalized, kind, prompt)
+        if index is not None:
+            entry = _load()[0]['entries'][index]
+            print("✓ Explication reprise du cache (même expression)")
+            return entry['explanation']
+
+        query = _embed([normalized])
+        if query is not None:
+            query = query[0]
+        index, similarity = _search(normalized, kind, prompt, query)
+        if index is not None and similarity >= threshold():
+            entry = _load()[0]['entries'][index]
+            if confirm_reuse(text, entry, similarity):
+                print(f"✓ Explication reprise du cache (\"{entry['text']}\")")
+                return entry['explanation']
+
+    explanation = explain()
+    store(text, kind, prompt, explanation, query)
+    return explanation
+
+
+def print_stats():
+    """Affiche le contenu du cache"""
+    cache, vectors = _load()
+    counts = {kind: sum(entry['kind'] == kind for entry in cache['entries']) for kind in KINDS}
+    dimension = vectors.shape[1] if vectors.ndim == 2 else 0
+    print(f"✓ {len(cache['entries'])} explication(s) en cache ({counts['expression']} expression(s), "
+          f"{counts['mot']} mot(s)), vecteurs {dimension} dimensions, modèle {cache['model']}")
+
+
+def print_lookup(text, kind):
+    """Affiche l'explication la plus proche d'une expression (version actuelle du prompt)"""
+    from prompts import prompt_id
+
+    name = 'vocab_explanation_expression' if kind == 'expression' else 'vocab_explanation_word'
+    start = time.perf_counter()
+    entry, similarity = lookup(text, kind, prompt_id(name))
+    elapsed = (time.perf_counter() - start) * 1000
+    if entry is None:
+        print(f"⚠️  Aucune explication en cache pour \"{text}\" ({elapsed:.1f} ms)")
+        return
+    status = "reprise" if similarity >= threshold() else f"sous le seuil {threshold():.0%}"
+    print(f"✓ \"{entry['text']}\" : similarité {similarity:.0%} ({status}, {elapsed:.1f} ms)\n")
+    print(entry['explanation'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cache sémantique des explications vocab')
+    parser.add_argument('command', choices=['stats', 'lookup'],
+                        help='stats : contenu du cache ; lookup : explication la plus proche d\'une expression')
+    parser.add_argument('text', nargs='?', help='Expression ou mot (pour lookup)')
+    parser.add_argument('--mot', action='store_true', help='Chercher parmi les explications de mots')
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        print_stats()
+    else:
+        if not args.text:
+            print("❌ Erreur : Précise l'expression (ex: python semantic_cache.py lookup \"ce n'est pas gagné\")")
+            sys.exit(1)
+        print_lookup(args.text, 'mot' if args.mot else 'expression')
+
+
+if __name__ == '__main__':
+    main()
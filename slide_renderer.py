@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Rendu direct des visuels des posts en PNG avec Pillow, sans navigateur ni capture d'écran :
+- slide carrée "Which version is correct?" des posts grammaire
+- pile titre / captures / traductions / footer des posts vocab
+
+Les mesures reprennent le CSS de assets/app.css (en px CSS, multipliées par `scale`).
+Les polices (assets/fonts/*.woff2, voir fonts.py) et les mesures de texte sont mises en cache.
+"""
+
+import io
+import os
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont
+from fonts import FONTS, woff2_path
+
+# Hauteur de ligne CSS "normal" (≈ 1.2 × taille de police pour Inter et Fira Mono)
+NORMAL_LINE_HEIGHT = 1.2
+
+# Slide grammaire (.post-card .slide et ses enfants)
+GRAMMAR_SLIDE = {
+    'size': 540,
+    'padding': 40,
+    'background': '#2b2b2b',
+    'header_background': '#c62828',
+    'header_padding': (10, 20),
+    'header_size': 18,
+    'header_margin': 40,
+    'option_size': 20,
+    'option_line_height': 1.5,
+    'option_margin': 25,
+    'options_margin': 40,
+    'footer_size': 14,
+    'footer_color': '#bdbdbd',
+}
+
+# Pile vocab (.post-vocab .title, .screenshot, .translation-box, .footer, .movie-title-overlay)
+VOCAB_SLIDE = {
+    'width': 562,
+    'title_background': '#e0e0e0',
+    'title_padding': 20,
+    'title_size': 24,
+    'translation_background': '#212121',
+    'translation_padding': 16,
+    'translation_size': 17,
+    'footer_padding': 10,
+    'footer_size': 17,
+    'overlay_size': 8,
+    'overlay_padding': 5,
+}
+
+VOCAB_FOOTER_TEXT = "(Open the post to reveal the explanation)"
+GRAMMAR_HEADER_TEXT = "Which version is correct?"
+GRAMMAR_FOOTER_TEXT = "(Answer + explanation in description)"
+
+# Captures redimensionnées gardées pour les rendus suivants (visible puis caché d'un même post)
+SCREENSHOT_CACHE_SIZE = 4
+
+_FONT_FILES = {(font['family'], font['weight']): woff2_path(font) for font in FONTS}
+_missing_fonts_reported = set()
+# (id de l'image, largeur) -> (image, capture RGB redimensionnée) ; l'image est gardée pour que son id reste unique
+_screenshots = {}
+
+
+@lru_cache(maxsize=None)
+def get_font(family, weight, size):
+    """Police Pillow (chargée une seule fois par famille/graisse/taille)"""
+    path = _FONT_FILES.get((family, weight))
+    if path and os.path.exists(path):
+        return ImageFont.truetype(path, size)
+    if (family, weight) not in _missing_fonts_reported:
+        _missing_fonts_reported.add((family, weight))
+        print(f"⚠️  Attention : police {family} {weight} introuvable (lance python3 fonts.py build), police par défaut utilisée")
+    return ImageFont.load_default(size)
+
+
+@lru_cache(maxsize=65536)
+def text_width(family, weight, size, text):
+    """Largeur d'un texte en pixels (mémoïsée)"""
+    return get_font(family, weight, size).getlength(text)
+
+
+@lru_cache(maxsize=4096)
+def wrap_text(family, weight, size, text, max_width):
+    """Découpe un texte en lignes tenant dans max_width (retour à la ligne sur les espaces, comme le navigateur)"""
+    lines = []
+    for paragraph in text.split('\n'):
+        current = ''
+        for word in paragraph.split(' '):
+            candidate = f"{current} {word}" if current else word
+            if current and text_width(family, weight, size, candidate) > max_width:
+                lines.append(current)
+                current = word
+            else:
+                current = candidate
+        lines.append(current)
+    return tuple(lines)
+
+
+def _draw_lines(draw, lines, family, weight, size, line_height, left, width, top, color):
+    """Dessine des lignes centrées horizontalement, chacune dans une boîte de hauteur line_height"""
+    font = get_font(family, weight, size)
+    ascent, descent = font.getmetrics()
+    # Comme en CSS, l'espace en trop de la ligne est réparti au-dessus et en dessous du texte
+    baseline_offset = (line_height - (ascent + descent)) / 2 + ascent
+    for i, line in enumerate(lines):
+        x = left + (width - text_width(family, weight, size, line)) / 2
+        draw.text((x, top + i * line_height + baseline_offset), line, font=font, fill=color, anchor='ls')
+
+
+def render_grammar_slide(option1, option2, option3, scale=2):
+    """Rend la slide carrée des 3 options d'un post grammaire"""
+    s = GRAMMAR_SLIDE
+    size = s['size'] * scale
+    padding = s['padding'] * scale
+    content_width = size - 2 * padding
+
+    header_size = s['header_size'] * scale
+    header_pad_y, header_pad_x = (p * scale for p in s['header_padding'])
+    header_line = header_size * NORMAL_LINE_HEIGHT
+    header_height = header_line + 2 * header_pad_y
+
+    option_size = s['option_size'] * scale
+    option_line = option_size * s['option_line_height']
+    options = [
+        wrap_text('Inter', 400, option_size, f"{i}. {text}", content_width)
+        for i, text in enumerate((option1, option2, option3), 1)
+    ]
+    options_height = sum(len(lines) * option_line + s['option_margin'] * scale for lines in options)
+
+    footer_size = s['footer_size'] * scale
+    footer_lines = wrap_text('Inter', 400, footer_size, GRAMMAR_FOOTER_TEXT, content_width)
+    footer_height = len(footer_lines) * footer_size * NORMAL_LINE_HEIGHT
+
+    content_height = (header_height + s['header_margin'] * scale + options_height
+                      + s['options_margin'] * scale + footer_height)
+    height = max(size, int(content_height + 2 * padding))
+
+    image = Image.new('RGB', (size, height), s['background'])
+    draw = ImageDraw.Draw(image)
+
+    # Contenu centré verticalement (justify-content: center)
+    y = (height - content_height) / 2
+
+    header_width = text_width('Inter', 700, header_size, GRAMMAR_HEADER_TEXT) + 2 * header_pad_x
+    header_left = (size - header_width) / 2
+    draw.rounded_rectangle((header_left, y, header_left + header_width, y + header_height),
+                           radius=header_height / 2, fill=s['header_background'])
+    _draw_lines(draw, (GRAMMAR_HEADER_TEXT,), 'Inter', 700, header_size, header_line,
+                header_left, header_width, y + header_pad_y, 'white')
+    y += header_height + s['header_margin'] * scale
+
+    for lines in options:
+        _draw_lines(draw, lines, 'Inter', 400, option_size, option_line, padding, content_width, y, 'white')
+        y += len(lines) * option_line + s['option_margin'] * scale
+    y += s['options_margin'] * scale
+
+    _draw_lines(draw, footer_lines, 'Inter', 400, footer_size, footer_size * NORMAL_LINE_HEIGHT,
+                padding, content_width, y, s['footer_color'])
+
+    return image
+
+
+def _text_band(family, size, padding, text, width, scale):
+    """Mesure une bande de texte centré (titre, traduction, footer)"""
+    size *= scale
+    padding *= scale
+    lines = wrap_text(family, 400, size, text, width - 2 * padding)
+    line_height = size * NORMAL_LINE_HEIGHT
+    return {'family': family, 'size': size, 'padding': padding, 'lines': lines,
+            'line_height': line_height, 'height': int(round(len(lines) * line_height + 2 * padding))}
+
+
+@lru_cache(maxsize=64)
+def render_text_band(family, size, padding, text, width, scale, background, color):
+    """Bande de texte centré rendue en image (mémoïsée : titre et footer reviennent à chaque slide)"""
+    band = _text_band(family, size, padding, text, width, scale)
+    image = Image.new('RGB', (width, band['height']), background)
+    _draw_lines(ImageDraw.Draw(image), band['lines'], family, 400, band['size'], band['line_height'],
+                0, width, band['padding'], color)
+    return image
+
+
+def resized_screenshot(screenshot, width):
+    """Capture en RGB à la largeur de la slide (redimensionnée une seule fois par image et largeur)"""
+    key = (id(screenshot), width)
+    cached = _screenshots.get(key)
+    if cached is not None:
+        return cached[1]
+    height = round(screenshot.height * width / screenshot.width)
+    resized = screenshot.convert('RGB').resize((width, height), Image.LANCZOS)
+    if len(_screenshots) >= SCREENSHOT_CACHE_SIZE:
+        del _screenshots[next(iter(_screenshots))]
+    _screenshots[key] = (screenshot, resized)
+    return resized
+
+
+def render_vocab_slide(expression, image1, translation1, image2, translation2,
+                       movie_title1, movie_title2, scale=2):
+    """Rend la pile titre / capture 1 / traduction 1 / capture 2 / traduction 2 / footer d'un post vocab"""
+    s = VOCAB_SLIDE
+    width = s['width'] * scale
+
+    title = f'What does "{expression}" mean here?'
+    dark, light = s['translation_background'], s['title_background']
+    bands = [
+        render_text_band('Fira Mono', s['title_size'], s['title_padding'], title, width, scale, light, 'black'),
+        render_text_band('Inter', s['translation_size'], s['translation_padding'], translation1, width, scale,
+                         dark, 'white'),
+        render_text_band('Inter', s['translation_size'], s['translation_padding'], translation2, width, scale,
+                         dark, 'white'),
+        render_text_band('Fira Mono', s['footer_size'], s['footer_padding'], VOCAB_FOOTER_TEXT, width, scale,
+                         light, 'black'),
+    ]
+    screenshots = [resized_screenshot(screenshot, width) for screenshot in (image1, image2)]
+
+    total_height = sum(band.height for band in bands) + sum(shot.height for shot in screenshots)
+    image = Image.new('RGB', (width, total_height), 'white')
+    draw = ImageDraw.Draw(image)
+
+    def draw_band(band, y):
+        image.paste(band, (0, y))
+        return y + band.height
+
+    def draw_screenshot(shot, movie_title, y):
+        image.paste(shot, (0, y))
+        # Titre du film en haut à droite (.movie-title-overlay)
+        size = s['overlay_size'] * scale
+        padding = s['overlay_padding'] * scale
+        line_height = size * NORMAL_LINE_HEIGHT
+        box_width = text_width('Fira Mono', 400, size, movie_title) + 2 * padding
+        box_height = line_height + 2 * padding
+        draw.rectangle((width - box_width, y, width, y + box_height), fill=dark)
+        _draw_lines(draw, (movie_title,), 'Fira Mono', 400, size, line_height,
+                    width - box_width, box_width, y + padding, 'white')
+        return y + shot.height
+
+    y = draw_band(bands[0], 0)
+    y = draw_screenshot(screenshots[0], movie_title1, y)
+    y = draw_band(bands[1], y)
+    y = draw_screenshot(screenshots[1], movie_title2, y)
+    y = draw_band(bands[2], y)
+    draw_band(bands[3], y)
+
+    return image
+
+
+def save_png(image, output_path):
+    """Enregistre le rendu en PNG (compression rapide : le fichier est posté puis archivé)"""
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', compress_level=3)
+    with open(output_path, 'wb') as f:
+        f.write(buffer.getvalue())
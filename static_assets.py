@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Bundle statique partagé par tous les posts : assets/app.css et assets/app.js sont publiés
+une seule fois dans posts/_assets/ sous un nom versionné par hash de contenu
+(app.<hash>.css / app.<hash>.js), et chaque page HTML générée ne fait que les référencer.
+Si les polices locales ont été générées (python fonts.py build), elles sont publiées dans
+posts/_assets/fonts/ et déclarées en tête du CSS : plus aucun appel à Google Fonts.
+"""
+
+import hashlib
+import json
+import os
+from fonts import FONTS, woff2_path, local_fonts_available
+
+ASSETS_SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+ASSETS_OUTPUT_DIR = 'posts/_assets'
+BUNDLE_FILES = ['app.css', 'app.js']
+
+# Chemins publiés (calculés une seule fois par processus)
+_published = {}
+
+
+def _publish(content, name, extension):
+    """Écrit un fichier sous un nom versionné par hash (si absent) et retourne son chemin"""
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    output_path = os.path.join(ASSETS_OUTPUT_DIR, f"{name}.{digest}{extension}")
+    # Nom versionné : un fichier existant a forcément le bon contenu
+    if not os.path.exists(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, 'wb') as f:
+            f.write(content)
+    return output_path
+
+
+def _font_face_css():
+    """Publie les polices WOFF2 locales et retourne les règles @font-face correspondantes"""
+    rules = []
+    for font in FONTS:
+        with open(woff2_path(font), 'rb') as f:
+            font_path = _publish(f.read(), f"fonts/{font['name']}", '.woff2')
+        rules.append(
+            "@font-face {\n"
+            f"    font-family: '{font['family']}';\n"
+            "    font-style: normal;\n"
+            f"    font-weight: {font['weight']};\n"
+            # block : pas de rendu avec une police de secours, les captures restent identiques
+            "    font-display: block;\n"
+            f"    src: url(\"fonts/{os.path.basename(font_path)}\") format('woff2');\n"
+            "}\n"
+        )
+    return '\n'.join(rules) + '\n'
+
+
+def publish_assets():
+    """Publie le bundle dans posts/_assets/ (si absent) et retourne les chemins versionnés"""
+    if _published:
+        return _published
+
+    for filename in BUNDLE_FILES:
+        with open(os.path.join(ASSETS_SOURCE_DIR, filename), 'rb') as f:
+            content = f.read()
+        if filename == 'app.css' and local_fonts_available():
+            content = _font_face_css().encode('utf-8') + content
+        name, extension = os.path.splitext(filename)
+        _published[filename] = _publish(content, name, extension)
+
+    return _published
+
+
+def asset_urls(html_dir):
+    """Chemins relatifs du bundle depuis le dossier de la page HTML (ex: 'posts/grammar')"""
+    published = publish_assets()
+    return {
+        extension: os.path.relpath(path, html_dir).replace(os.sep, '/')
+        for extension, path in (('css', published['app.css']), ('js', published['app.js']))
+    }
+
+
+def font_links(google_fonts_url):
+    """Balises <head> pour les polices : rien si elles sont auto-hébergées, sinon Google Fonts"""
+    if local_fonts_available():
+        return ''
+    return (
+        '    <link rel="preconnect" href="https://fonts.googleapis.com">\n'
+        '    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>\n'
+        f'    <link href="{google_fonts_url}" rel="stylesheet">\n'
+    )
+
+
+def config_json(config):
+    """Sérialise la configuration du post pour le bloc <script type="application/json">"""
+    # '</' est échappé pour qu'un texte contenant '</script>' ne ferme pas le bloc
+    return json.dumps(config, ensure_ascii=False).replace('</', '<\\/')
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Moteur de recherche dans les sous-titres des séries françaises (.srt / .vtt) pour trouver
+des scènes qui contiennent une expression ou un mot.
+
+L'index inversé est stocké dans subtitles.db (SQLite) : pour chaque terme normalisé (minuscules,
+sans accents, forme de base des verbes courants et terminaisons retirées) et chaque fichier,
+la liste des (réplique, position) où il apparaît. Une recherche lit les listes des termes de
+l'expression en commençant par le plus rare et vérifie qu'ils se suivent dans la réplique
+(quelques mots intercalés tolérés : "vous faites vraiment fausse route").
+
+Convention : un dossier par série (subtitles/Lupin/S01E03.srt), le nom du dossier sert de titre.
+
+Usage:
+    python subtitle_index.py build [dossier ...] [--full]     # défaut : subtitles/
+    python subtitle_index.py search --expression "faire fausse route" [--limit 10]
+    python subtitle_index.py search --mot "déplacement"
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+DB_PATH = 'subtitles.db'
+# À incrémenter quand la normalisation des termes change (tout est alors réindexé)
+INDEX_VERSION = 2
+DEFAULT_SUBTITLES_DIR = 'subtitles'
+SUBTITLE_EXTENSIONS = ('.srt', '.vtt')
+
+# Mots intercalés tolérés entre deux termes consécutifs de l'expression
+MAX_GAP = 2
+DEFAULT_LIMIT = 10
+# Au-delà, la fréquence exacte d'un terme n'importe plus pour choisir l'ordre de lecture
+FREQUENCY_CAP = 100000
+# Répliques départagées sur leur texte (fixe : même classement quel que soit --limit)
+CANDIDATE_POOL = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    title TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cues (
+    file_id INTEGER NOT NULL,
+    cue INTEGER NOT NULL,
+    start_ms INTEGER NOT NULL,
+    end_ms INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (file_id, cue)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    occurrences BLOB NOT NULL,
+    PRIMARY KEY (term, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_by_file ON postings (file_id);
+"""
+
+TIMING_PATTERN = re.compile(
+    r'(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{3})'
+)
+MARKUP_PATTERN = re.compile(r'<[^>]+>|\{\\[^}]*\}')
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Formes des verbes irréguliers courants (sans accents) -> infinitif
+IRREGULAR_FORMS = {
+    'etre': 'suis es est sommes etes sont etais etait etions etiez etaient ete serai seras sera serons '
+            'serez seront serais serait serions seriez seraient sois soit soyons soyez soient fus fut',
+    'avoir': 'ai as a avons avez ont avais avait avions aviez avaient eu eue eus aurai auras aura aurons '
+             'aurez auront aurais aurait aurions auriez auraient aie aies ait ayons ayez aient',
+    'faire': 'fais fait faisons faites font faisais faisait faisions faisiez faisaient ferai feras fera '
+             'ferons ferez feront ferais ferait ferions feriez feraient fasse fasses fassions fassiez '
+             'fassent faite faits',
+    'aller': 'vais vas va allons allez vont allais allait allions alliez allaient alle allee alles allees '
+             'irai iras ira irons irez iront irais irait irions iriez iraient aille ailles aillent',
+    'pouvoir': 'peux peut pouvons pouvez peuvent pouvais pouvait pu pourrai pourra pourrais pourrait puisse',
+    'vouloir': 'veux veut voulons voulez veulent voulais voulait voulu voudrai voudra voudrais voudrait veuille',
+    'devoir': 'dois doit devons devez doivent devais devait dus due devrai devra devrais devrait doive',
+    'savoir': 'sais sait savons savez savent savais savait su saurai saura saurais saurait sache',
+    'venir': 'viens vient venons venez viennent venais venait venu venue venus viendrai viendra '
+             'viendrais viendrait vienne',
+    'prendre': 'prends prend prenons prenez prennent prenais prenait pris prise prises prendrai prendra '
+               'prendrais prendrait prenne',
+    'dire': 'dis dit disons dites disent disais disait dite dits dirai dira dirais dirait dise',
+    'voir': 'vois voit voyons voyez voient voyais voyait vu vue vus verrai verra verrais verrait voie',
+    'mettre': 'mets met mettons mettez mettent mettais mettait mis mise mettrai mettra mettrais mettrait mette',
+    # Pronoms réfléchis : "se rendre compte" trouve "je me rends compte" (t' reste à part : "t'es" = tu es)
+    'se': 'me te m s',
+}
+LEMMAS = {form: lemma for lemma, forms in IRREGULAR_FORMS.items() for form in [lemma] + forms.split()}
+
+# Formes élidées -> mot complet ("c'est pas gagné" trouve "ce n'est pas gagné") ; l' vaut le ou la,
+# les deux articles sont donc indexés comme le
+ELISIONS = {'c': 'ce', 'l': 'le', 'la': 'le', 'd': 'de', 'j': 'je', 'qu': 'que', 'n': 'ne'}
+
+# Négation souvent omise à l'oral ("c'est pas gagné") : ignorée à l'index comme dans la requête
+SKIPPED_TOKENS = {'ne', 'n'}
+
+# Terminaisons retirées (la plus longue d'abord), en gardant au moins 3 lettres
+SUFFIXES = sorted(
+    'eraient erions eriez erons eront erais erait issent issait issais aient ions iez ait ais ant '
+    'ent ons ees ues ez er es ee ue us re ir is it e s x i u'.split(),
+    key=len, reverse=True
+)
+
+_db = None
+
+
+def get_db():
+    """Connexion SQLite (ouverte et schéma créé au premier appel)"""
+    global _db
+    if _db is None:
+        _db = sqlite3.connect(DB_PATH)
+        _db.execute('PRAGMA journal_mode=WAL')
+        _db.execute('PRAGMA synchronous=NORMAL')
+        _db.executescript(SCHEMA)
+    return _db
+
+
+def fold(text):
+    """Minuscules sans accents ("Déplacement" -> "deplacement")"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+@lru_cache(maxsize=200000)
+def normalize_token(token):
+    """Terme indexé pour un mot déjà replié : mot complet des élisions, infinitif des verbes
+    irréguliers, sinon terminaison retirée"""
+    token = ELISIONS.get(token, token)
+    if token in LEMMAS:
+        return LEMMAS[token]
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text):
+    """Termes normalisés d'un texte, dans l'ordre (les élisions sont séparées : c'est -> ce, etre)"""
+    return [normalize_token(token) for token in TOKEN_PATTERN.findall(fold(text))
+            if token not in SKIPPED_TOKENS]
+
+
+def clean_cue_text(lines):
+    """Texte d'une réplique sans balises (<i>, {\\an8}) sur une seule ligne"""
+    return ' '.join(' '.join(MARKUP_PATTERN.sub('', line) for line in lines).split())
+
+
+def _timing_ms(hours, minutes, seconds, millis):
+    """Horodatage en millisecondes"""
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis)
+
+
+def parse_subtitles(path):
+    """Répliques d'un fichier .srt ou .vtt : liste de (début ms, fin ms, texte)"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    try:
+        content = raw.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        # Beaucoup de .srt français sont encore en Windows-1252
+        content = raw.decode('cp1252', errors='replace')
+
+    cues = []
+    timing, lines = None, []
+    for line in content.splitlines() + ['']:
+        line = line.strip()
+        match = TIMING_PATTERN.search(line) if '-->' in line else None
+        if match:
+            timing, lines = match, []
+        elif not line:
+            if timing and lines:
+                text = clean_cue_text(lines)
+                if text:
+                    cues.append((_timing_ms(*timing.groups()[:4]), _timing_ms(*timing.groups()[4:]), text))
+            timing, lines = None, []
+        elif timing:
+            lines.append(line)
+    return cues
+
+
+def file_title(path, root):
+    """Titre de la série : dossier de premier niveau sous la racine, sinon nom du fichier"""
+    relative = os.path.relpath(path, root)
+    parts = relative.split(os.sep)
+    return parts[0] if len(parts) > 1 else os.path.splitext(parts[0])[0]
+
+
+def _scan_subtitles(roots):
+    """Liste les fichiers de sous-titres : chemin -> (titre, mtime_ns, taille)"""
+    found = {}
+    for root in roots:
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.lower().endswith(SUBTITLE_EXTENSIONS):
+                    path = os.path.join(directory, filename)
+                    stat = os.stat(path)
+                    found[path] = (file_title(path, root), stat.st_mtime_ns, stat.st_size)
+    return found
+
+
+def _remove_file(db, file_id):
+    """Supprime un fichier de l'index"""
+    db.execute('DELETE FROM postings WHERE file_id = ?', (file_id,))
+    db.execute('DELETE FROM cues WHERE file_id = ?', (file_id,))
+    db.execute('DELETE FROM files WHERE id = ?', (file_id,))
+
+
+def _index_file(db, path, title, mtime_ns, size):
+    """Indexe les répliques d'un fichier et ses listes de (réplique, position) par terme"""
+    cues = parse_subtitles(path)
+    file_id = db.execute(
+        'INSERT INTO files (path, title, mtime_ns, size) VALUES (?, ?, ?, ?)',
+        (path, title, mtime_ns, size)
+    ).lastrowid
+
+    occurrences = {}
+    for cue, (_, __, text) in enumerate(cues):
+        for position, term in enumerate(tokenize(text)):
+            occurrences.setdefault(term, array('I')).extend((cue, position))
+
+    db.executemany(
+        'INSERT INTO cues (file_id, cue, start_ms, end_ms, text) VALUES (?, ?, ?, ?, ?)',
+        [(file_id, cue, start_ms, end_ms, text) for cue, (start_ms, end_ms, text) in enumerate(cues)]
+    )
+    db.executemany(
+        'INSERT INTO postings (term, file_id, occurrences) VALUES (?, ?, ?)',
+        [(term, file_id, values.tobytes()) for term, values in occurrences.items()]
+    )
+    return len(cues)
+
+
+def build_index(roots, full=False):
+    """Met à jour l'index en ne relisant que les fichiers ajoutés ou modifiés sous les dossiers donnés"""
+    start = time.perf_counter()
+    db = get_db()
+    if db.execute('PRAGMA user_version').fetchone()[0] != INDEX_VERSION:
+        # Index créé avec une autre normalisation : les termes ne correspondent plus
+        with db:
+            db.execute('DELETE FROM postings')
+            db.execute('DELETE FROM cues')
+            db.execute('DELETE FROM files')
+    roots = [os.path.normpath(root) for root in roots]
+    found = _scan_subtitles(roots)
+
+    indexed = {}
+    for file_id, path, mtime_ns, size in db.execute('SELECT id, path, mtime_ns, size FROM files'):
+        if any(path == root or path.startswith(root + os.sep) for root in roots):
+            indexed[path] = (file_id, mtime_ns, size)
+
+    added = removed = cue_count = 0
+    with db:
+        for path, (file_id, mtime_ns, size) in indexed.items():
+            if full or path not in found or found[path][1:] != (mtime_ns, size):
+                _remove_file(db, file_id)
+                removed += path not in found
+        for path, (title, mtime_ns, size) in found.items():
+            entry = indexed.get(path)
+            if full or entry is None or entry[1:] != (mtime_ns, size):
+                cue_count += _index_file(db, path, title, mtime_ns, size)
+                added += 1
+        db.execute(f'PRAGMA user_version = {INDEX_VERSION}')
+
+    print(f"✓ Index des sous-titres à jour : {len(found)} fichiers, {added} indexé(s) "
+          f"({cue_count} répliques), {removed} supprimé(s), {time.perf_counter() - start:.1f} s")
+
+
+def _decode(blob, wanted=None):
+    """Occurrences d'un terme dans un fichier : réplique -> positions (seulement les répliques voulues)"""
+    values = array('I')
+    values.frombytes(blob)
+    # Paires (réplique, position) écrites dans l'ordre des répliques : recherche par dichotomie
+    cues, positions = values[0::2], values[1::2]
+    if wanted is None:
+        wanted = set(cues)
+    found = {}
+    for cue in wanted:
+        start = bisect_left(cues, cue)
+        end = bisect_right(cues, cue, start)
+        if start < end:
+            found[cue] = positions[start:end].tolist()
+    return found
+
+
+def _best_alignment(position_lists):
+    """Plus petit nombre de mots intercalés pour lire les termes dans l'ordre (None si impossible)"""
+    best = None
+    for first in position_lists[0]:
+        previous, gaps = first, 0
+        for positions in position_lists[1:]:
+            following = [p for p in positions if p > previous]
+            if not following or min(following) - previous - 1 > MAX_GAP:
+                gaps = None
+                break
+            gaps += min(following) - previous - 1
+            previous = min(following)
+        if gaps is not None and (best is None or gaps < best):
+            best = gaps
+    return best
+
+
+def _term_frequency(db, term):
+    """Nombre de fichiers qui contiennent le terme (plafonné)"""
+    return db.execute(
+        'SELECT count(*) FROM (SELECT 1 FROM postings WHERE term = ? LIMIT ?)', (term, FREQUENCY_CAP)
+    ).fetchone()[0]
+
+
+def search(text, limit=DEFAULT_LIMIT):
+    """Répliques qui contiennent l'expression, les plus proches du texte exact d'abord"""
+    db = get_db()
+    query_terms = tokenize(text)
+    if not query_terms:
+        return []
+
+    # Lecture des listes en commençant par le terme le plus rare (jointure dans cet ordre)
+    distinct = sorted(set(query_terms), key=lambda term: _term_frequency(db, term))
+    joins = ''.join(
+        f' CROSS JOIN postings p{i} ON p{i}.term = ? AND p{i}.file_id = p0.file_id'
+        for i in range(1, len(distinct))
+    )
+    columns = ', '.join(f'p{i}.occurrences' for i in range(len(distinct)))
+    rows = db.execute(
+        f'SELECT p0.file_id, {columns} FROM postings p0{joins} WHERE p0.term = ?',
+        distinct[1:] + distinct[:1]
+    )
+
+    candidates, exact_count = [], 0
+    for file_id, *blobs in rows:
+        # Répliques du terme le plus rare, puis filtrées terme après terme
+        by_term, common_cues = {}, None
+        for term, blob in zip(distinct, blobs):
+            by_term[term] = _decode(blob, common_cues)
+            common_cues = set(by_term[term])
+            if not common_cues:
+                break
+        for cue in common_cues:
+            gaps = _best_alignment([by_term[term][cue] for term in query_terms])
+            if gaps is not None:
+                candidates.append((gaps, file_id, cue))
+                exact_count += gaps == 0
+        # Assez de répliques sans mot intercalé (impossible de faire mieux) : inutile de lire la suite
+        if exact_count >= max(CANDIDATE_POOL, limit):
+            break
+
+    # Départage sur le texte : expression exacte (sans accents) d'abord, puis répliques courtes
+    candidates.sort()
+    folded_query = ' '.join(TOKEN_PATTERN.findall(fold(text)))
+    results, seen = [], set()
+    for gaps, file_id, cue in candidates[:max(CANDIDATE_POOL, limit)]:
+        path, title, start_ms, end_ms, cue_text = db.execute(
+            'SELECT files.path, files.title, cues.start_ms, cues.end_ms, cues.text '
+            'FROM cues JOIN files ON files.id = cues.file_id WHERE cues.file_id = ? AND cues.cue = ?',
+            (file_id, cue)
+        ).fetchone()
+        # Même épisode en .srt et en .vtt : la réplique n'est gardée qu'une fois
+        key = (os.path.splitext(path)[0], start_ms // 1000)
+        if key in seen:
+            continue
+        seen.add(key)
+        results.append({
+            'path': path,
+            'title': title,
+            'start_ms': start_ms,
+            'end_ms': end_ms,
+            'text': cue_text,
+            'gaps': gaps,
+            'exact': folded_query in ' '.join(TOKEN_PATTERN.findall(fold(cue_text))),
+        })
+    results.sort(key=lambda result: (result['gaps'], not result['exact'], len(result['text'])))
+    return results[:limit]
+
+
+def find_scenes(text, count=2):
+    """Meilleures répliques pour un post, dans des fichiers différents si possible"""
+    results = search(text, limit=DEFAULT_LIMIT * 2)
+    scenes, used_paths = [], set()
+    for result in results:
+        if result['path'] not in used_paths:
+            scenes.append(result)
+            used_paths.add(result['path'])
+    # Pas assez de fichiers différents : on complète avec les autres répliques
+    scenes += [result for result in results if result not in scenes]
+    return scenes[:count]
+
+
+def format_timestamp(ms):
+    """Horodatage lisible (01:02:03,456)"""
+    seconds, millis = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
+
+
+def print_results(text, limit):
+    """Affiche les répliques trouvées avec leur horodatage"""
+    start = time.perf_counter()
+    results = search(text, limit)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    for i, result in enumerate(results, 1):
+        print(f"{i:2d}. {result['title']} — {result['path']}  "
+              f"{format_timestamp(result['start_ms'])} → {format_timestamp(result['end_ms'])}")
+        print(f"    {result['text']}")
+    print(f"\n✓ {len(results)} réplique(s) pour \"{text}\" ({elapsed:.1f} ms)")
+
+    # Répliques que generate.py --corpus utilisera (dans cet ordre pour --image1 et --image2)
+    chosen = [i for scene in find_scenes(text) for i, result in enumerate(results, 1) if result == scene]
+    if chosen:
+        print(f"  generate.py --corpus utilise : {', '.join(str(i) for i in chosen)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Index et recherche d\'expressions dans les sous-titres (.srt/.vtt)'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Indexe les fichiers de sous-titres')
+    build_parser.add_argument('directories', nargs='*', default=[DEFAULT_SUBTITLES_DIR],
+                              help=f'Dossiers de sous-titres (défaut : {DEFAULT_SUBTITLES_DIR}/)')
+    build_parser.add_argument('--full', action='store_true',
+                              help='Réindexe tous les fichiers')
+
+    search_parser = subparsers.add_parser('search', help='Cherche les répliques qui contiennent une expression')
+    group = search_parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--expression', help='Expression française (ex: "faire fausse route")')
+    group.add_argument('--mot', help='Mot français (ex: "déplacement")')
+    search_parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT,
+                               help=f'Nombre de répliques affichées (défaut : {DEFAULT_LIMIT})')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        missing = [directory for directory in args.directories if not os.path.isdir(directory)]
+        if missing:
+            print(f"❌ Erreur : Dossier introuvable : {', '.join(missing)}")
+            sys.exit(1)
+        build_index(args.directories, full=args.full)
+    else:
+        if not os.path.exists(DB_PATH):
+            print(f"❌ Erreur : Index {DB_PATH} introuvable (lance d'abord : python subtitle_index.py build)")
+            sys.exit(1)
+        print_results(args.expression or args.mot, args.limit)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Mini moteur de templates pour les pages HTML des posts (dossier templates/).
+
+Syntaxe :
+    {{ nom }}                          emplacement remplacé par la valeur du contexte (sans échappement)
+    {% extends "base.html" %}          hérite de la mise en page commune
+    {% block nom %}...{% endblock %}   bloc redéfini par le template enfant
+
+Chaque template est lu, résolu (héritage) et compilé une seule fois par processus en une
+fonction Python qui ne fait que concaténer les parties statiques et les valeurs.
+"""
+
+import os
+import re
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+EXTENDS_PATTERN = re.compile(r'^\s*\{%\s*extends\s+"([^"]+)"\s*%\}')
+BLOCK_PATTERN = re.compile(r'\{%\s*block\s+(\w+)\s*%\}(.*?)\{%\s*endblock\s*%\}', re.DOTALL)
+SLOT_PATTERN = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+# Templates compilés (nom -> fonction de rendu)
+_compiled = {}
+
+
+def _resolve(name):
+    """Lit un template et applique l'héritage : les blocs de l'enfant remplacent ceux du parent"""
+    with open(os.path.join(TEMPLATES_DIR, name), 'r', encoding='utf-8') as f:
+        source = f.read()
+
+    match = EXTENDS_PATTERN.match(source)
+    if not match:
+        return source
+
+    child_blocks = dict(BLOCK_PATTERN.findall(source))
+    parent = _resolve(match.group(1))
+    return BLOCK_PATTERN.sub(
+        lambda block: '{%% block %s %%}%s{%% endblock %%}' % (
+            block.group(1), child_blocks.get(block.group(1), block.group(2))),
+        parent
+    )
+
+
+def _compile(name):
+    """Compile un template en fonction render(context) -> str"""
+    # Les balises de bloc restantes ne servent plus : on garde leur contenu
+    source = BLOCK_PATTERN.sub(lambda block: block.group(2), _resolve(name))
+
+    parts = SLOT_PATTERN.split(source)
+    static_parts = tuple(parts[0::2])
+    slot_names = parts[1::2]
+
+    # Génère : def render(c): return ''.join((_S[0], str(c['a']), _S[1], ...))
+    pieces = ['_S[0]']
+    for i, slot in enumerate(slot_names):
+        pieces.append(f"str(c[{slot!r}])")
+        pieces.append(f"_S[{i + 1}]")
+    code = f"def render(c):\n    return ''.join(({', '.join(pieces)},))\n"
+
+    namespace = {}
+    exec(compile(code, f"<template {name}>", 'exec'), {'_S': static_parts}, namespace)
+    render = namespace['render']
+    render.slots = frozenset(slot_names)
+    return render
+
+
+def get_template(name):
+    """Retourne la fonction de rendu du template (compilée au premier appel)"""
+    render = _compiled.get(name)
+    if render is None:
+        render = _compiled[name] = _compile(name)
+    return render
+
+
+def render_template(name, **context):
+    """Rend un template avec les valeurs du contexte"""
+    render = get_template(name)
+    missing = render.slots - context.keys()
+    if missing:
+        raise KeyError(f"Template {name} : valeurs manquantes {sorted(missing)}")
+    return render(context)
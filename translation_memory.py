@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Mémoire de traduction des sous-titres (translation_memory.db, SQLite).
+
+Chaque réplique française traduite est enregistrée avec sa traduction littérale et/ou naturelle.
+Avant d'appeler le modèle, generate.py cherche la réplique :
+    1. à l'identique (empreinte du texte normalisé : casse, espaces, apostrophes, guillemets) :
+       la traduction est reprise directement
+    2. sinon une réplique très proche (trigrammes de caractères communs, similarité >= FUZZY_THRESHOLD),
+       pour absorber les petites différences d'OCR ou de ponctuation : la réplique proche et sa
+       traduction sont affichées et l'opérateur confirme la reprise. Un mot changé peut inverser le
+       sens ("Il est pas venu" / "Il est venu" : 93 %) ; une réplique proche qui ne diffère que par
+       une négation n'est jamais proposée
+
+Seules les répliques absentes partent au modèle. TRANSLATION_MEMORY=0 (.env) désactive la mémoire.
+
+Usage:
+    python translation_memory.py stats
+    python translation_memory.py lookup "Ça vous dérange pas la fumée ?"
+"""
+
+import argparse
+import hashlib
+import re
+import sqlite3
+import sys
+import time
+import unicodedata
+from collections import Counter
+from core import getenv
+from deadline import paused
+
+DB_PATH = 'translation_memory.db'
+# Similarité minimale (coefficient de Dice sur les trigrammes) pour réutiliser une traduction proche
+FUZZY_THRESHOLD = 0.9
+KINDS = ('literal', 'natural')
+# Mots de négation : une réplique proche qui en ajoute ou en retire un n'a pas le même sens
+NEGATIONS = {'ne', 'n', 'pas', 'jamais', 'rien', 'personne', 'plus', 'aucun', 'aucune', 'nul', 'nulle',
+             'guère', 'point', 'non', 'sans', 'ni'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    id INTEGER PRIMARY KEY,
+    hash TEXT UNIQUE NOT NULL,
+    french TEXT NOT NULL,
+    literal TEXT,
+    natural TEXT,
+    gram_count INTEGER NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS trigrams (
+    gram TEXT NOT NULL,
+    translation_id INTEGER NOT NULL,
+    PRIMARY KEY (gram, translation_id)
+) WITHOUT ROWID;
+"""
+
+QUOTES = str.maketrans({'’': "'", '‘': "'", '«': '"', '»': '"', '“': '"', '”': '"'})
+# Espace de la typographie française avant ? ! : ; ("pas ?" et "pas?" sont la même réplique)
+SPACE_BEFORE_PUNCTUATION = re.compile(r'\s+([?!:;])')
+WORD_PATTERN = re.compile(r'\w+')
+
+_db = None
+
+
+def is_enabled():
+    """Mémoire active (désactivable avec TRANSLATION_MEMORY=0)"""
+    return (getenv('TRANSLATION_MEMORY') or '1') != '0'
+
+
+def get_db():
+    """Connexion SQLite (ouverte et schéma créé au premier appel)"""
+    global _db
+    if _db is None:
+        _db = sqlite3.connect(DB_PATH)
+        _db.execute('PRAGMA journal_mode=WAL')
+        _db.executescript(SCHEMA)
+    return _db
+
+
+def normalize(text):
+    """Texte comparable d'une réplique (casse, espaces, apostrophes et guillemets unifiés)"""
+    text = unicodedata.normalize('NFC', text).translate(QUOTES).lower()
+    text = SPACE_BEFORE_PUNCTUATION.sub(r'\1', ' '.join(text.split()))
+    return text.strip('"').strip()
+
+
+def text_hash(normalized):
+    """Empreinte d'une réplique normalisée"""
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def trigrams(normalized):
+    """Trigrammes de caractères (avec bords) d'une réplique normalisée"""
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _fuzzy_match(db, normalized, kind):
+    """Réplique la plus proche qui a une traduction de ce type : (id, similarité) ou None"""
+    grams = trigrams(normalized)
+    # Dice >= seuil impose un nombre de trigrammes proche : on ne compare que ces répliques
+    low = len(grams) * FUZZY_THRESHOLD / (2 - FUZZY_THRESHOLD)
+    high = len(grams) * (2 - FUZZY_THRESHOLD) / FUZZY_THRESHOLD
+    placeholders = ','.join('?' * len(grams))
+    row = db.execute(
+        f'SELECT t.id, 2.0 * count(*) / (t.gram_count + ?) AS similarity '
+        f'FROM trigrams g JOIN translations t ON t.id = g.translation_id '
+        f'WHERE g.gram IN ({placeholders}) AND t.gram_count BETWEEN ? AND ? AND t.{kind} IS NOT NULL '
+        f'GROUP BY t.id ORDER BY similarity DESC LIMIT 1',
+        [len(grams), *grams, low, high]
+    ).fetchone()
+    if row and row[1] >= FUZZY_THRESHOLD:
+        return row
+    return None
+
+
+def differing_words(normalized, other):
+    """Mots présents dans une seule des deux répliques normalisées (avec leur nombre d'occurrences)"""
+    words, other_words = Counter(WORD_PATTERN.findall(normalized)), Counter(WORD_PATTERN.findall(other))
+    return set((words - other_words) + (other_words - words))
+
+
+def lookup(french, kind):
+    """Traduction connue d'une réplique, sans appel au modèle : dict (id, french, translation,
+    similarity, negation) ou None. negation : la réplique proche diffère par une négation"""
+    if kind not in KINDS:
+        raise ValueError(f"Type de traduction inconnu : {kind}")
+    db = get_db()
+    normalized = normalize(french)
+
+    row = db.execute(f'SELECT id, french, {kind} FROM translations WHERE hash = ?', (text_hash(normalized),)).fetchone()
+    similarity = 1.0
+    if row is None or row[2] is None:
+        match = _fuzzy_match(db, normalized, kind)
+        if match is None:
+            return None
+        translation_id, similarity = match
+        row = db.execute(f'SELECT id, french, {kind} FROM translations WHERE id = ?', (translation_id,)).fetchone()
+
+    return {
+        'id': row[0],
+        'french': row[1],
+        'translation': row[2],
+        'similarity': similarity,
+        'negation': bool(differing_words(normalized, normalize(row[1])) & NEGATIONS),
+    }
+
+
+def _count_hit(translation_id):
+    """Compte un appel au modèle évité"""
+    db = get_db()
+    with db:
+        db.execute('UPDATE translations SET hits = hits + 1 WHERE id = ?', (translation_id,))
+
+
+def store(french, kind, translation):
+    """Enregistre la traduction d'une réplique (complète l'entrée si l'autre type existe déjà)"""
+    db = get_db()
+    normalized = normalize(french)
+    grams = trigrams(normalized)
+    with db:
+        row = db.execute('SELECT id FROM translations WHERE hash = ?', (text_hash(normalized),)).fetchone()
+        if row:
+            db.execute(f'UPDATE translations SET {kind} = ?, updated_at = ? WHERE id = ?',
+                       (translation, time.time(), row[0]))
+            return
+        translation_id = db.execute(
+            f'INSERT INTO translations (hash, french, {kind}, gram_count, updated_at) VALUES (?, ?, ?, ?, ?)',
+            (text_hash(normalized), french, translation, len(grams), time.time())
+        ).lastrowid
+        db.executemany('INSERT INTO trigrams (gram, translation_id) VALUES (?, ?)',
+                       [(gram, translation_id) for gram in grams])
+
+
+def confirm_reuse(french, match):
+    """Demande à l'opérateur s'il reprend la traduction d'une réplique proche (mais différente)"""
+    print(f"\n💡 Traduction en mémoire pour une réplique proche (similarité {match['similarity']:.0%}) :")
+    print(f"   demandée : \"{french}\"")
+    print(f"   en mémoire : \"{match['french']}\" → \"{match['translation']}\"")
+    # Le temps de réponse de l'opérateur ne compte pas dans le budget du post (POST_BUDGET)
+    try:
+        with paused():
+            answer = input("Reprendre cette traduction ? (oui/non) : ").strip().lower()
+    except EOFError:
+        answer = ''
+    return answer == 'oui'
+
+
+def translate_with_memory(french, kind, translate):
+    """Traduction depuis la mémoire (réplique identique, ou proche si l'opérateur confirme),
+    sinon via translate(french) puis enregistrée"""
+    if not is_enabled():
+        return translate(french)
+
+    match = lookup(french, kind)
+    if match is not None:
+        if match['similarity'] == 1.0:
+            _count_hit(match['id'])
+            print("✓ Mémoire de traduction (identique)")
+            return match['translation']
+        if match['negation']:
+            print(f"⚠️  Réplique proche en mémoire ignorée (négation différente) : \"{match['french']}\"")
+        elif confirm_reuse(french, match):
+            _count_hit(match['id'])
+            print(f"✓ Mémoire de traduction (réplique proche, {match['similarity']:.0%})")
+            return match['translation']
+
+    translation = translate(french)
+    store(french, kind, translation)
+    return translation
+
+
+def print_stats():
+    """Affiche le contenu de la mémoire"""
+    db = get_db()
+    count, literal, natural, hits = db.execute(
+        'SELECT count(*), count(literal), count(natural), coalesce(sum(hits), 0) FROM translations'
+    ).fetchone()
+    print(f"✓ {count} réplique(s) en mémoire ({literal} littérale(s), {natural} naturelle(s)), "
+          f"{hits} appel(s) au modèle évité(s)")
+
+
+def print_lookup(french):
+    """Affiche les traductions connues d'une réplique"""
+    for kind in KINDS:
+        start = time.perf_counter()
+        match = lookup(french, kind)
+        elapsed = (time.perf_counter() - start) * 1000
+        if match is None:
+            print(f"{kind:<8} (absente, {elapsed:.1f} ms)")
+            continue
+        status = ""
+        if match['similarity'] != 1.0:
+            status = f", \"{match['french']}\", {'ignorée : négation différente' if match['negation'] else 'à confirmer'}"
+        print(f"{kind:<8} {match['translation']}  (similarité {match['similarity']:.0%}{status}, {elapsed:.1f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mémoire de traduction des sous-titres')
+    parser.add_argument('command', choices=['stats', 'lookup'],
+                        help='stats : contenu de la mémoire ; lookup : traductions connues d\'une réplique')
+    parser.add_argument('french', nargs='?', help='Réplique française (pour lookup)')
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        print_stats()
+    else:
+        if not args.french:
+            print("❌ Erreur : Précise la réplique (ex: python translation_memory.py lookup \"Ça vous dérange pas ?\")")
+            sys.exit(1)
+        print_lookup(args.french)
+
+
+if __name__ == '__main__':
+    main()